@@ -29,9 +29,15 @@ INITIAL_SOC          = float(
 raw_price  = os.getenv("PRICE_SERIES")
 raw_demand = os.getenv("DEMAND_SERIES")
 
+PRICE_SEED       = int(os.getenv("PRICE_SEED", "42"))
+# shared on-disk cache of generated series (empty → no cache)
+SERIES_CACHE_DIR = os.getenv("SERIES_CACHE_DIR", "")
+
 if raw_price in (None, "", "GENERATE"):
-    from src.data.series_model import generate_price_series
-    PRICE_SERIES = generate_price_series(HORIZON)
+    from src.data.series_model import cached_price_series
+    PRICE_SERIES = cached_price_series(
+        HORIZON, seed=PRICE_SEED, cache_dir=SERIES_CACHE_DIR or None
+    )
 else:
     PRICE_SERIES = [float(p) for p in raw_price.split(",")]
 
@@ -62,6 +68,10 @@ MODEL_QWEN          = os.getenv("MODEL_QWEN",       "qwen/qwen-2.5-coder-32b-ins
 if not OPENROUTER_API_KEY:
     raise ValueError("OPENROUTER_API_KEY must be set in your .env")
 
+# shared on-disk cache of LLM responses keyed by request payload (empty → off);
+# holds only replies sampled at temperature 0 (TASK_/CODE_TEMPERATURE)
+LLM_CACHE_DIR       = os.getenv("LLM_CACHE_DIR", "")
+
 TASK_TEMPERATURE    = float(os.getenv("TASK_TEMPERATURE", "0.30"))
 TASK_MAX_TOKENS     = int(os.getenv("TASK_MAX_TOKENS",  "512"))
 CODE_TEMPERATURE    = float(os.getenv("CODE_TEMPERATURE", "0.20"))
@@ -73,3 +83,55 @@ CODE_MAX_TOKENS     = int(os.getenv("CODE_MAX_TOKENS",  "512"))
 MAX_RATE_KWH        = float(os.getenv("MAX_RATE_KWH",  "10.0"))
 EFF_CHARGE          = float(os.getenv("EFF_CHARGE",    "1.0"))
 EFF_DISCHARGE       = float(os.getenv("EFF_DISCHARGE", "1.0"))
+
+# ------------------------------------------------------------------
+# 5. Candidate racing (successive halving)
+# ------------------------------------------------------------------
+RACE_CANDIDATES     = int(os.getenv("RACE_CANDIDATES",       "1"))
+RACE_MIN_BUDGET     = int(os.getenv("RACE_MIN_BUDGET",       "4"))
+RACE_GROWTH         = int(os.getenv("RACE_GROWTH",           "2"))
+RACE_DROP_FRACTION  = float(os.getenv("RACE_DROP_FRACTION",  "0.5"))
+RACE_MODE           = os.getenv("RACE_MODE", "prefix")   # prefix | coarse
+
+# ------------------------------------------------------------------
+# 6. Per-series feature store
+# ------------------------------------------------------------------
+FEATURE_WINDOWS   = [
+    int(w) for w in os.getenv("FEATURE_WINDOWS", "24").split(",") if w.strip()
+]
+STEPS_PER_DAY     = int(os.getenv("STEPS_PER_DAY", "24"))
+FEATURE_CACHE_DIR = os.getenv("FEATURE_CACHE_DIR", ".cache/features")
+
+# ------------------------------------------------------------------
+# 7. Meta-update retries
+# ------------------------------------------------------------------
+# ϑ rejections repaired by the Code Generator before re-planning
+META_MAX_REPAIRS    = int(os.getenv("META_MAX_REPAIRS", "2"))
+# generate the next policy in the background while the current one acts
+META_ASYNC          = os.getenv("META_ASYNC", "0").lower() in ("1", "true", "yes")
+# seconds to wait at a segment end for a background update (<0: until done;
+# 0 never blocks, so a fast backtest usually ends before any update lands).
+# No update is started at the last meta-step.
+META_ASYNC_WAIT_S   = float(os.getenv("META_ASYNC_WAIT_S", "-1"))
+
+# ------------------------------------------------------------------
+# 8. Model-predictive control reference policy
+# ------------------------------------------------------------------
+MPC_LOOKAHEAD        = int(os.getenv("MPC_LOOKAHEAD",          "1000"))
+MPC_SOC_STEP         = float(os.getenv("MPC_SOC_STEP",         "1.0"))
+MPC_LATENCY_BUDGET_S = float(os.getenv("MPC_LATENCY_BUDGET_S", "0.005"))
+
+# policy for the first meta segment: moving_average | mpc
+BASE_POLICY          = os.getenv("BASE_POLICY", "moving_average")
+
+# ------------------------------------------------------------------
+# 9. Tariff (defaults = plain market-price billing)
+# ------------------------------------------------------------------
+TARIFF_IMPORT_MULT    = float(os.getenv("TARIFF_IMPORT_MULT",    "1.0"))
+TARIFF_EXPORT_MULT    = float(os.getenv("TARIFF_EXPORT_MULT",    "1.0"))
+# time-of-use import adders, step-of-day ranges: "17-21:0.10,22-6:-0.05"
+TARIFF_TOU            = os.getenv("TARIFF_TOU", "")
+TARIFF_DEMAND_CHARGE  = float(os.getenv("TARIFF_DEMAND_CHARGE",  "0.0"))
+_raw_cap              = os.getenv("TARIFF_EXPORT_CAP_KWH")
+TARIFF_EXPORT_CAP_KWH = float(_raw_cap) if _raw_cap not in (None, "") else None
+TARIFF_DAYS_PER_MONTH = int(os.getenv("TARIFF_DAYS_PER_MONTH",   "30"))
@@ -2,25 +2,50 @@
 # File: src/algorithm/nested_algorithm.py
 
 import logging
-from typing import Any, Dict, List, Sequence
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Sequence
 
-from config import HORIZON, META_STEPS
+from config import HORIZON, META_STEPS, BASE_POLICY, META_ASYNC, META_ASYNC_WAIT_S
 from src.environment.battery_env import BatteryEnvironment
 from src.policies.moving_average_policy import MovingAveragePolicy
+from src.policies.mpc_policy import MPCPolicy
 from src.meta.meta_controller import meta_update
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
 
-def run_nested_algorithm() -> Dict[str, Any]:
+def _snapshot(hat_N: Dict[str, List[float]]) -> Dict[str, List[float]]:
+    """Copy of the history that the main loop can keep appending to."""
+    return {k: list(v) for k, v in hat_N.items()}
+
+
+def run_nested_algorithm(
+    *,
+    asynchronous: bool = META_ASYNC,
+    await_s: float = META_ASYNC_WAIT_S,
+) -> Dict[str, Any]:
     """
     Runs the hierarchical (meta + base) nested algorithm.
 
+    With ``asynchronous=True`` each meta-update runs in a background
+    thread on a snapshot of the history while the current policy keeps
+    acting; the new policy is swapped in at the next step boundary once
+    it is ready.  Every action is attributed to a policy generation.
+    At the end of a segment the loop waits up to ``await_s`` seconds
+    (negative: until done) for an update still in flight, so a fast
+    backtest does not outrun the LLM; with ``await_s=0`` a backtest
+    usually finishes before any update lands.  No update is started at
+    the last meta-step, since nothing would be left to install it into,
+    and one still running when the run ends is cancelled before its next
+    LLM call.
+
     Returns
     -------
     dict with keys:
-        final_state, history, meta_params, final_policy, per_segment
+        final_state, history, meta_params, final_policy, per_segment,
+        race_reports, policy_trace, policy_log
     """
     env = BatteryEnvironment()
     N_current = env.reset()  # [soc, imported, price, cost, demand]
@@ -33,26 +58,110 @@ def run_nested_algorithm() -> Dict[str, Any]:
     }
 
     T_current: Dict[str, Any] = {"learning_rate": 0.01, "window_size": 24}
-    base_policy = MovingAveragePolicy(window=T_current["window_size"])
+    if BASE_POLICY == "mpc":
+        base_policy = MPCPolicy()
+        if env.tariff is not None:
+            logger.warning(
+                "MPC base policy plans with market prices; the configured "
+                "tariff is applied to billing only."
+            )
+    else:
+        base_policy = MovingAveragePolicy(window=T_current["window_size"])
     segment_len = HORIZON // META_STEPS
     results: List[Dict[str, Any]] = []
+    race_reports: List[Dict[str, Any]] = []
+
+    # policy_trace[n] = generation of the policy that produced action n
+    policy_trace: List[int] = []
+    policy_log: List[Dict[str, Any]] = [
+        dict(
+            generation=0,
+            policy_name=base_policy.__class__.__name__,
+            meta_params=T_current.copy(),
+            active_from_step=0,
+        )
+    ]
+
+    executor = (
+        ThreadPoolExecutor(max_workers=1, thread_name_prefix="meta-update")
+        if asynchronous else None
+    )
+    pending: Optional[Future] = None
+    cancel = threading.Event()
+    # race reports of the in-flight update, merged only if it is installed
+    pending_reports: List[Dict[str, Any]] = []
+
+    def install(new_policy, new_params: Dict[str, Any]) -> None:
+        nonlocal base_policy, T_current
+        base_policy, T_current = new_policy, new_params
+        policy_log.append(
+            dict(
+                generation=len(policy_log),
+                policy_name=base_policy.__class__.__name__,
+                meta_params=T_current.copy(),
+                active_from_step=env.step_index,
+            )
+        )
+        logger.info(
+            "Meta-update ➜ %s  T=%s (generation %d from step %d)",
+            base_policy.__class__.__name__,
+            T_current,
+            len(policy_log) - 1,
+            env.step_index,
+        )
+
+    def poll() -> None:
+        """Hot-swap the background update if it has finished."""
+        nonlocal pending
+        if pending is None or not pending.done():
+            return
+        try:
+            install(*pending.result())
+            race_reports.extend(pending_reports)
+        except Exception as e:
+            logger.warning(
+                "Background meta-update failed (%s); keeping %s",
+                e,
+                base_policy.__class__.__name__,
+            )
+        pending = None
 
     for V in range(META_STEPS):
         logger.info("=== Meta-step V=%d ===", V)
 
         # Meta-update
-        if V > 0:
-            base_policy, T_current = meta_update(base_policy, hat_N, T_current)
-            logger.info(
-                "Meta-update ➜ %s  T=%s",
-                base_policy.__class__.__name__,
-                T_current,
+        poll()
+        if V > 0 and executor is None:
+            install(*meta_update(
+                base_policy, hat_N, T_current, race_reports=race_reports
+            ))
+        elif V == META_STEPS - 1 and pending is None:
+            logger.info("Last meta-step; no background update started")
+        elif V > 0 and pending is None:
+            pending_reports = []
+            pending = executor.submit(
+                meta_update,
+                base_policy,
+                _snapshot(hat_N),
+                T_current.copy(),
+                race_reports=pending_reports,
+                cancel=cancel,
             )
+            logger.info("Meta-update V=%d running in background", V)
+        elif V > 0:
+            logger.info("Meta-update still running; V=%d keeps current policy", V)
 
         # Inner loop over this segment
         for _ in range(segment_len):
-            # Convert state array to tuple of floats
-            state: Sequence[float] = tuple(float(x) for x in N_current)
+            # Hot-swap at the step boundary once the background update is done
+            poll()
+
+            # Convert state array to tuple of floats; policies that set
+            # `uses_features = True` also get the env's feature row appended
+            if getattr(base_policy, "uses_features", False):
+                state: Sequence[float] = tuple(float(x) for x in env.observation())
+            else:
+                state = tuple(float(x) for x in N_current)
 
             # Call unified API
             Q_n = base_policy.take_action(state)
@@ -81,10 +190,18 @@ def run_nested_algorithm() -> Dict[str, Any]:
             delta_cost = float(N_current[3]) - hat_N["total_cost_record"][-1]
             hat_N["cost_per_time_record"].append(delta_cost)
             hat_N["total_cost_record"].append(float(N_current[3]))
+            policy_trace.append(len(policy_log) - 1)
 
         # Segment cost
         segment_cost = sum(hat_N["cost_per_time_record"][-segment_len:])
         logger.info("Segment %d cost = %.3f", V, segment_cost)
+        if hasattr(base_policy, "solve_stats"):
+            logger.info("Solver stats: %s", base_policy.solve_stats())
+
+        # Give the background update a bounded chance to land before the
+        # next segment (it is installed at that segment's first step)
+        if pending is not None and await_s != 0 and V < META_STEPS - 1:
+            wait([pending], timeout=None if await_s < 0 else await_s)
 
         results.append(
             dict(
@@ -92,14 +209,25 @@ def run_nested_algorithm() -> Dict[str, Any]:
                 end_state=N_current.copy(),
                 meta_params=T_current.copy(),
                 policy_name=base_policy.__class__.__name__,
+                policy_generations=sorted(set(policy_trace[-segment_len:])),
                 segment_cost=segment_cost,
             )
         )
 
+    if executor is not None:
+        if pending is not None:
+            logger.info("Run finished with a meta-update still in flight; cancelling it")
+        # the worker stops before its next LLM call; its results are dropped
+        cancel.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
     return dict(
         final_state=N_current,
         history=hat_N,
         meta_params=T_current,
         final_policy=base_policy,
         per_segment=results,
+        race_reports=race_reports,
+        policy_trace=policy_trace,
+        policy_log=policy_log,
     )
@@ -0,0 +1,250 @@
+# File: src/algorithm/racing.py
+"""
+Successive-halving racing of candidate policies.
+
+Every candidate is first scored on a short slice of the price/demand
+series; the worst fraction is dropped, the budget for the survivors is
+multiplied by the growth factor, and the race repeats until a single
+candidate remains.  Only the finalists ever see the full segment.
+"""
+from __future__ import annotations
+
+import logging
+import math
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from config import (
+    HORIZON,
+    META_STEPS,
+    PRICE_SERIES,
+    DEMAND_SERIES,
+    INITIAL_SOC,
+    RACE_MIN_BUDGET,
+    RACE_GROWTH,
+    RACE_DROP_FRACTION,
+    RACE_MODE,
+    FEATURE_WINDOWS,
+    STEPS_PER_DAY,
+    FEATURE_CACHE_DIR,
+)
+from src.data.feature_store import compute_features, load_features
+from src.utils.tariff import (
+    DEFAULT_TARIFF, Tariff, TariffDefault, default_tariff, resolve_tariff,
+)
+from src.utils.transition import transition
+
+logger = logging.getLogger(__name__)
+
+PolicyFactory = Callable[[], Any]
+
+
+def budget_schedule(
+    max_budget: int,
+    *,
+    min_budget: int = RACE_MIN_BUDGET,
+    growth: int = RACE_GROWTH,
+) -> List[int]:
+    """
+    Geometric budget ladder ``min_budget, min_budget*growth, …`` capped
+    at (and always ending with) ``max_budget``.
+    """
+    if max_budget < 1:
+        raise ValueError("max_budget must be >= 1")
+    if growth < 2:
+        raise ValueError("growth must be >= 2")
+
+    budgets: List[int] = []
+    b = max(1, min(min_budget, max_budget))
+    while b < max_budget:
+        budgets.append(b)
+        b *= growth
+    budgets.append(max_budget)
+    return budgets
+
+
+def _series_view(budget: int, max_budget: int, mode: str) -> np.ndarray:
+    """
+    Indices of the ``budget + 1`` points to simulate ``budget`` steps on.
+
+    prefix – the first ``budget`` steps of the series
+    coarse – the full ``max_budget`` span decimated to ``budget`` steps
+    """
+    if mode == "prefix":
+        return np.arange(budget + 1)
+    if mode == "coarse":
+        return np.round(np.linspace(0, max_budget, budget + 1)).astype(int)
+    raise ValueError(f"Unknown racing mode {mode!r} (expected 'prefix' or 'coarse')")
+
+
+def simulate_policy(
+    policy,
+    price_series: Sequence[float],
+    demand_series: Sequence[float],
+    n_steps: int,
+    *,
+    initial_soc: float = INITIAL_SOC,
+    tariff: Tariff | TariffDefault | None = DEFAULT_TARIFF,
+    feature_rows: np.ndarray | None = None,
+) -> float:
+    """
+    Roll ``policy`` forward for ``n_steps`` through ``transition`` and
+    return the cumulative cost.  Invalid actions default to 0.0 exactly
+    as in the nested algorithm.
+
+    ``tariff`` (default: from TARIFF_* settings, like ``BatteryEnvironment``)
+    bills every step through a fresh ``TariffState``; ``None`` keeps
+    market-price billing.
+
+    Policies with ``uses_features = True`` get the observation, i.e. the
+    state followed by ``feature_rows[n]`` (default: features computed on
+    the given series), as in the nested algorithm.
+    """
+    if getattr(policy, "uses_features", False) and feature_rows is None:
+        feature_rows = compute_features(
+            price_series, demand_series,
+            windows=FEATURE_WINDOWS, steps_per_day=STEPS_PER_DAY,
+        ).matrix
+    tariff = resolve_tariff(tariff)
+    billing = tariff.new_state() if tariff is not None else None
+    state = np.array(
+        [initial_soc, 0.0, price_series[0], 0.0, demand_series[0]],
+        dtype=float,
+    )
+    for n in range(n_steps):
+        try:
+            obs = state if feature_rows is None else np.concatenate([state, feature_rows[n]])
+            Q_n = policy.take_action(tuple(float(x) for x in obs))
+            if Q_n is None:
+                raise TypeError("take_action returned None")
+            Q_n = float(Q_n)
+        except (TypeError, ValueError):
+            Q_n = 0.0
+        state = transition(
+            state, Q_n, price_series[n + 1], demand_series[n + 1], billing
+        )
+    return float(state[3])
+
+
+def _same_score(a: float, b: float) -> bool:
+    return a == b or math.isclose(a, b, rel_tol=1e-12, abs_tol=1e-12)
+
+
+def race_candidates(
+    factories: Sequence[PolicyFactory],
+    *,
+    price_series: Sequence[float] | None = None,
+    demand_series: Sequence[float] | None = None,
+    max_budget: int | None = None,
+    budgets: Sequence[int] | None = None,
+    min_budget: int = RACE_MIN_BUDGET,
+    growth: int = RACE_GROWTH,
+    drop_fraction: float = RACE_DROP_FRACTION,
+    mode: str = RACE_MODE,
+) -> Tuple[int, Dict[str, Any]]:
+    """
+    Race candidate policies with successive halving.
+
+    Parameters
+    ----------
+    factories : sequence of zero-arg callables
+        Each call must return a *fresh* policy instance; policies are
+        stateful, so every rung re-simulates from step 0.
+    max_budget : int
+        Steps simulated on the final rung (default: one meta segment).
+    budgets : sequence of int, optional
+        Explicit schedule; overrides ``min_budget`` / ``growth``.
+    drop_fraction : float
+        Share of the field eliminated after each rung (at least one
+        candidate is dropped and at least one survives).  Candidates tied
+        at the cut all advance; only the final rung breaks ties by index.
+    mode : "prefix" | "coarse"
+        Score on a series prefix or on a decimated full-length view.
+
+    Returns
+    -------
+    (winner_index, report) where report holds the schedule and, per rung,
+    the budget, scores, survivors and eliminated candidates.
+    """
+    if not factories:
+        raise ValueError("race_candidates needs at least one candidate")
+    if not 0.0 < drop_fraction < 1.0:
+        raise ValueError("drop_fraction must be in (0, 1)")
+
+    prices  = np.asarray(PRICE_SERIES if price_series is None else price_series, dtype=float)
+    demands = np.asarray(DEMAND_SERIES if demand_series is None else demand_series, dtype=float)
+    if max_budget is None:
+        max_budget = HORIZON // META_STEPS
+    max_budget = min(max_budget, len(prices) - 1, len(demands) - 1)
+
+    if budgets is None:
+        budgets = budget_schedule(max_budget, min_budget=min_budget, growth=growth)
+    budgets = [min(int(b), max_budget) for b in budgets]
+
+    tariff = default_tariff()
+    features = load_features(
+        prices, demands,
+        windows=FEATURE_WINDOWS, steps_per_day=STEPS_PER_DAY,
+        cache_dir=FEATURE_CACHE_DIR or None,
+    ).matrix
+    alive = list(range(len(factories)))
+    report: Dict[str, Any] = {
+        "mode": mode,
+        "schedule": list(budgets),
+        "n_candidates": len(factories),
+        "rungs": [],
+    }
+
+    rung = 0
+    while len(alive) > 1:
+        budget = budgets[min(rung, len(budgets) - 1)]
+        idx = _series_view(budget, max_budget, mode)
+
+        scores: Dict[int, float] = {}
+        for i in alive:
+            try:
+                scores[i] = simulate_policy(
+                    factories[i](), prices[idx], demands[idx], budget,
+                    tariff=tariff, feature_rows=features[idx],
+                )
+            except Exception as e:
+                logger.warning("Candidate %d crashed on rung %d: %s", i, rung, e)
+                scores[i] = math.inf
+
+        ranked = sorted(alive, key=lambda i: scores[i])
+        # Last rung of the schedule: no more budget to grant, pick the best
+        if rung >= len(budgets) - 1:
+            n_keep = 1
+        else:
+            n_drop = max(1, int(len(ranked) * drop_fraction))
+            n_keep = max(1, len(ranked) - n_drop)
+            # Never split a tie at the cut (e.g. policies still warming up
+            # all score the same on short prefixes): carry the whole tie
+            # to the next, longer rung instead of dropping by list order
+            cut = scores[ranked[n_keep - 1]]
+            while n_keep < len(ranked) and _same_score(scores[ranked[n_keep]], cut):
+                n_keep += 1
+
+        survivors, eliminated = ranked[:n_keep], ranked[n_keep:]
+        report["rungs"].append(
+            dict(
+                rung=rung,
+                budget=budget,
+                scores={i: scores[i] for i in ranked},
+                survivors=list(survivors),
+                eliminated=list(eliminated),
+            )
+        )
+        logger.info(
+            "Race rung %d (budget=%d): kept %s, dropped %s",
+            rung, budget, survivors, eliminated,
+        )
+        alive = survivors
+        rung += 1
+
+    report["winner"] = alive[0]
+    report["steps_simulated"] = sum(
+        r["budget"] * len(r["scores"]) for r in report["rungs"]
+    )
+    return alive[0], report
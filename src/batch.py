@@ -0,0 +1,261 @@
+#/Users/nashe/nested_policy_pipeline/src/batch.py
+"""
+Manifest-driven batch experiments (``python -m src.main --manifest …``).
+
+A manifest is a YAML or JSON list of configurations, each a mapping of
+the usual environment settings (HORIZON, META_STEPS,
+BATTERY_CAPACITY_KWH, PRICE_SEED, MODEL_QWEN, …) plus an optional
+``name``.  A mapping with ``defaults`` and ``jobs`` keys is accepted too:
+
+    defaults: {HORIZON: 150, META_STEPS: 5}
+    jobs:
+      - {name: cap50,  BATTERY_CAPACITY_KWH: 50}
+      - {name: cap100, BATTERY_CAPACITY_KWH: 100, PRICE_SEED: 7}
+
+Jobs run concurrently in a process pool.  Workers are reused, but each
+job gets its own environment and a fresh import of ``config`` and the
+``src`` packages, so module-level settings never leak between jobs.
+Workers never import matplotlib.  All jobs share one LLM response cache
+(LLM_CACHE_DIR), one series cache (SERIES_CACHE_DIR) and one feature
+cache (FEATURE_CACHE_DIR) under ``<out_dir>/cache``.
+
+Outputs in ``out_dir``: results.csv, results.npz, fig_cost_savings.png
+and one log file per job under logs/.  A job whose worker process dies
+is recorded as failed; the other jobs' results are still written.
+"""
+from __future__ import annotations
+
+import csv
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# environment of the worker process before any job touched it
+_BASE_ENV: Dict[str, str] = {}
+
+
+# ------------------------------------------------------------------
+# Manifest
+# ------------------------------------------------------------------
+def load_manifest(path: Path) -> List[Dict[str, Any]]:
+    """Read a YAML/JSON manifest into a list of named job dicts."""
+    text = Path(path).read_text()
+    if Path(path).suffix.lower() in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError as e:
+            raise RuntimeError(
+                "YAML manifests need PyYAML (pip install pyyaml); "
+                "or use a .json manifest."
+            ) from e
+        data = yaml.safe_load(text)
+    else:
+        data = json.loads(text)
+
+    defaults: Dict[str, Any] = {}
+    if isinstance(data, dict):
+        defaults = dict(data.get("defaults") or {})
+        data = data.get("jobs")
+    if not isinstance(data, list) or not all(isinstance(j, dict) for j in data):
+        raise ValueError("Manifest must be a list of mappings (or {defaults, jobs}).")
+
+    jobs = []
+    for i, job in enumerate(data):
+        merged = {**defaults, **job}
+        merged.setdefault("name", f"job_{i:03d}")
+        jobs.append(merged)
+    names = [j["name"] for j in jobs]
+    if len(set(names)) != len(names):
+        raise ValueError("Job names in the manifest must be unique.")
+    return jobs
+
+
+# ------------------------------------------------------------------
+# Worker side
+# ------------------------------------------------------------------
+def _init_worker(shared_env: Dict[str, str]) -> None:
+    os.environ.update(shared_env)
+    _BASE_ENV.clear()
+    _BASE_ENV.update(os.environ)
+
+
+def _purge_project_modules() -> None:
+    """Drop config/src modules so the next import re-reads the env."""
+    for name in list(sys.modules):
+        if name == "config" or (name.startswith("src.") and name != __name__):
+            del sys.modules[name]
+
+
+def _env_value(v: Any) -> str:
+    if isinstance(v, (list, tuple)):
+        return ",".join(str(x) for x in v)
+    return str(v)
+
+
+def _run_job(job: Dict[str, Any], log_dir: str) -> Dict[str, Any]:
+    """Run one manifest entry in an isolated config; never raises."""
+    name = job["name"]
+    os.environ.clear()
+    os.environ.update(_BASE_ENV)
+    os.environ.update({k: _env_value(v) for k, v in job.items() if k != "name"})
+    _purge_project_modules()
+
+    root = logging.getLogger()
+    for h in list(root.handlers):
+        root.removeHandler(h)
+    handler = logging.FileHandler(Path(log_dir) / f"{name}.log", mode="w")
+    handler.setFormatter(logging.Formatter("%(levelname)s | %(name)s | %(message)s"))
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
+
+    t0 = time.perf_counter()
+    try:
+        from src.main import run_experiment
+        out = run_experiment()
+        status, error = "ok", ""
+    except Exception as e:
+        logging.error("Job %s failed:\n%s", name, traceback.format_exc())
+        out, status, error = {}, "failed", f"{type(e).__name__}: {e}"
+    finally:
+        root.removeHandler(handler)
+        handler.close()
+
+    return dict(
+        name=name,
+        params={k: v for k, v in job.items() if k != "name"},
+        status=status,
+        error=error,
+        wall_s=time.perf_counter() - t0,
+        **out,
+    )
+
+
+# ------------------------------------------------------------------
+# Parent side
+# ------------------------------------------------------------------
+def _write_results(results: List[Dict[str, Any]], out_dir: Path) -> None:
+    param_keys = sorted({k for r in results for k in r["params"]})
+    with open(out_dir / "results.csv", "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["name", "status", *param_keys, "baseline_cost", "final_cost",
+                    "mean_savings_pct", "last_savings_pct", "n_segments",
+                    "wall_s", "error"])
+        for r in results:
+            sav = r.get("savings_pct") or []
+            w.writerow([
+                r["name"], r["status"],
+                *(_env_value(r["params"].get(k, "")) for k in param_keys),
+                r.get("baseline_cost", ""), r.get("final_cost", ""),
+                float(np.mean(sav)) if sav else "", sav[-1] if sav else "",
+                len(sav), round(r["wall_s"], 3), r["error"],
+            ])
+
+    arrays: Dict[str, np.ndarray] = {
+        "names": np.array([r["name"] for r in results]),
+        "status": np.array([r["status"] for r in results]),
+        "baseline_cost": np.array([r.get("baseline_cost", np.nan) for r in results], dtype=float),
+        "wall_s": np.array([r["wall_s"] for r in results], dtype=float),
+    }
+    for i, r in enumerate(results):
+        arrays[f"savings_pct_{i}"] = np.asarray(r.get("savings_pct") or [], dtype=float)
+        arrays[f"segment_costs_{i}"] = np.asarray(r.get("segment_costs") or [], dtype=float)
+    np.savez(out_dir / "results.npz", **arrays)
+
+
+def _plot_combined(results: List[Dict[str, Any]], out: Path) -> None:
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(7, 4))
+    plotted = 0
+    for r in results:
+        sav = r.get("savings_pct")
+        if sav:
+            plt.plot(range(1, len(sav) + 1), sav, marker="o",
+                     markerfacecolor="white", label=r["name"])
+            plotted += 1
+    plt.xlabel("Iteration", fontsize=12)
+    plt.ylabel("Cost savings [%]", fontsize=12)
+    plt.title("Development of cost savings over iterations", fontsize=13)
+    plt.grid(True, alpha=0.4)
+    if 0 < plotted <= 12:
+        plt.legend(fontsize=8)
+    plt.tight_layout()
+    plt.savefig(out, dpi=300)
+    plt.close()
+
+
+def run_manifest(
+    manifest: Path,
+    *,
+    out_dir: Path = Path("results"),
+    workers: int | None = None,
+) -> List[Dict[str, Any]]:
+    """Run every job of ``manifest`` and write the consolidated outputs."""
+    jobs = load_manifest(manifest)
+    out_dir = Path(out_dir)
+    log_dir = out_dir / "logs"
+    log_dir.mkdir(parents=True, exist_ok=True)
+    cache = (out_dir / "cache").resolve()
+
+    # Explicit settings win; otherwise every job shares out_dir/cache
+    shared_env = {
+        "LLM_CACHE_DIR":     os.getenv("LLM_CACHE_DIR")     or str(cache / "llm"),
+        "SERIES_CACHE_DIR":  os.getenv("SERIES_CACHE_DIR")  or str(cache / "series"),
+        "FEATURE_CACHE_DIR": os.getenv("FEATURE_CACHE_DIR") or str(cache / "features"),
+    }
+    workers = workers or min(len(jobs), os.cpu_count() or 1)
+    logger.info("Running %d jobs on %d workers → %s", len(jobs), workers, out_dir)
+
+    results: List[Dict[str, Any]] = []
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(shared_env,),
+    ) as pool:
+        futures = {pool.submit(_run_job, job, str(log_dir)): job for job in jobs}
+        for fut in as_completed(futures):
+            try:
+                r = fut.result()
+            except Exception as e:
+                # _run_job never raises; this is the pool itself failing
+                # (e.g. BrokenProcessPool after a worker died)
+                job = futures[fut]
+                r = dict(
+                    name=job["name"],
+                    params={k: v for k, v in job.items() if k != "name"},
+                    status="failed",
+                    error=f"{type(e).__name__}: {e}",
+                    wall_s=time.perf_counter() - t0,
+                )
+            results.append(r)
+            logger.info("[%d/%d] %s: %s (%.1fs)%s", len(results), len(jobs),
+                        r["name"], r["status"], r["wall_s"],
+                        f" – {r['error']}" if r["error"] else "")
+
+    order = {job["name"]: i for i, job in enumerate(jobs)}
+    results.sort(key=lambda r: order[r["name"]])
+    _write_results(results, out_dir)
+    _plot_combined(results, out_dir / "fig_cost_savings.png")
+    logger.info(
+        "Batch done in %.1fs: %d ok, %d failed; results in %s",
+        time.perf_counter() - t0,
+        sum(r["status"] == "ok" for r in results),
+        sum(r["status"] != "ok" for r in results),
+        out_dir.resolve(),
+    )
+    return results
@@ -0,0 +1,291 @@
+# File: src/bench/fake_openrouter.py
+"""
+Local OpenRouter-compatible chat endpoint for offline load testing.
+
+Answers ``POST /chat/completions`` with templated content:
+• planning models (anything but the code model) get a task description
+• the code model gets a ``GeneratedPolicy`` class, valid or deliberately
+  broken according to ``invalid_rate``, or cut in half with
+  ``finish_reason="length"`` according to ``truncate_rate`` (a follow-up
+  request carrying the partial reply receives the remainder)
+
+Latency, 5xx errors, 429s and hung requests (timeouts) are drawn per
+request from configurable distributions, so the real client code paths
+in ``task_generator`` / ``code_generator_qwen`` are exercised end to end.
+
+Usage
+-----
+from src.bench.fake_openrouter import FakeOpenRouter
+
+with FakeOpenRouter(latency="lognormal:0.5,0.4", rate_limit_rate=0.05) as srv:
+    os.environ["OPENROUTER_BASE_URL"] = srv.base_url
+    ...
+"""
+from __future__ import annotations
+
+import json
+import logging
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# ------------------------------------------------------------------
+# Response templates
+# ------------------------------------------------------------------
+TASK_TEMPLATE = (
+    "Write exactly one class `GeneratedPolicy` with an `__init__` taking only "
+    "the meta-parameters {params} (each with a default literal) and a "
+    "`take_action(self, state_of_charge, imported_energy, market_price, cost)` "
+    "method returning a float. Charge when the price is low, discharge when "
+    "it is high. Do not use import statements."
+)
+
+VALID_POLICY_TEMPLATE = '''```python
+class GeneratedPolicy:
+    def __init__(self, learning_rate: float = 0.01, window_size: int = 24):
+        self.learning_rate = learning_rate
+        self.window_size = window_size
+        self.threshold = {threshold}
+
+    def take_action(self, state_of_charge, imported_energy, market_price, cost):
+        if market_price < self.threshold:
+            return {rate}
+        if market_price > self.threshold:
+            return -min({rate}, state_of_charge)
+        return 0.0
+```'''
+
+INVALID_POLICY_TEMPLATES = [
+    # banned import
+    "import os\n\nclass GeneratedPolicy:\n"
+    "    def take_action(self, state):\n        return 0.0\n",
+    # __init__ parameter without a default
+    "class GeneratedPolicy:\n"
+    "    def __init__(self, threshold):\n        self.threshold = threshold\n\n"
+    "    def take_action(self, state):\n        return 0.0\n",
+    # no policy class at all
+    "def take_action(state):\n    return 0.0\n",
+]
+
+
+# ------------------------------------------------------------------
+# Latency distributions
+# ------------------------------------------------------------------
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Turn a latency spec into a sampler returning seconds.
+
+    const:S            – always S
+    uniform:LO,HI      – uniform in [LO, HI]
+    lognormal:MED,SIG  – log-normal with median MED and log-σ SIG
+    """
+    kind, _, args = spec.partition(":")
+    vals = [float(a) for a in args.split(",")] if args else []
+
+    if kind == "const" and len(vals) == 1:
+        return lambda rng: vals[0]
+    if kind == "uniform" and len(vals) == 2:
+        lo, hi = vals
+        return lambda rng: rng.uniform(lo, hi)
+    if kind == "lognormal" and len(vals) == 2:
+        mu, sigma = math.log(vals[0]), vals[1]
+        return lambda rng: rng.lognormvariate(mu, sigma)
+    raise ValueError(
+        f"Bad latency spec {spec!r} "
+        "(expected const:S, uniform:LO,HI or lognormal:MEDIAN,SIGMA)"
+    )
+
+
+# ------------------------------------------------------------------
+# Server
+# ------------------------------------------------------------------
+class FakeOpenRouter:
+    """
+    Threaded fake of the OpenRouter chat-completions API.
+
+    Parameters
+    ----------
+    latency, code_latency : str
+        Latency spec for planning / code requests (see ``parse_latency``).
+    code_model : str
+        Model name that receives policy code instead of a task prompt.
+    invalid_rate : float
+        Probability that a code response is rejected by ϑ.
+    truncate_rate : float
+        Probability that a valid code response is cut at max_tokens.
+    error_rate, rate_limit_rate, timeout_rate : float
+        Probabilities of a 500, a 429, or a request that hangs for
+        ``hang_s`` seconds (longer than the client timeout) before replying.
+    """
+
+    def __init__(
+        self,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: str = "const:0.0",
+        code_latency: str | None = None,
+        code_model: str = "qwen/qwen-2.5-coder-32b-instruct",
+        invalid_rate: float = 0.0,
+        truncate_rate: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        timeout_rate: float = 0.0,
+        hang_s: float = 5.0,
+        seed: int | None = None,
+    ):
+        self.code_model = code_model
+        self.invalid_rate = invalid_rate
+        self.truncate_rate = truncate_rate
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.timeout_rate = timeout_rate
+        self.hang_s = hang_s
+
+        self._plan_latency = parse_latency(latency)
+        self._code_latency = parse_latency(code_latency or latency)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.log: List[Dict[str, Any]] = []
+        self._pending: Dict[str, str] = {}   # truncated prefix → remainder
+
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    # -----------------------------------------------------------------
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeOpenRouter":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info("Fake OpenRouter listening on %s", self.base_url)
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeOpenRouter":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # -----------------------------------------------------------------
+    def _draw(self, model: str) -> Dict[str, Any]:
+        """Decide outcome and latency for one request (thread-safe)."""
+        with self._lock:
+            is_code = model == self.code_model
+            sampler = self._code_latency if is_code else self._plan_latency
+            latency = max(0.0, sampler(self._rng))
+            u = self._rng.random()
+            if u < self.timeout_rate:
+                outcome, latency = "timeout", self.hang_s
+            elif u < self.timeout_rate + self.rate_limit_rate:
+                outcome = "rate_limited"
+            elif u < self.timeout_rate + self.rate_limit_rate + self.error_rate:
+                outcome = "error"
+            elif is_code and self._rng.random() < self.invalid_rate:
+                outcome = "invalid"
+            elif is_code and self._rng.random() < self.truncate_rate:
+                outcome = "truncated"
+            else:
+                outcome = "ok"
+            extra = dict(
+                threshold=round(self._rng.uniform(0.3, 0.8), 3),
+                rate=round(self._rng.uniform(1.0, 10.0), 1),
+                invalid=self._rng.choice(INVALID_POLICY_TEMPLATES),
+            )
+        return dict(model=model, is_code=is_code, outcome=outcome,
+                    latency=latency, **extra)
+
+    def _content(self, draw: Dict[str, Any], payload: Dict[str, Any]) -> Tuple[str, str]:
+        """Return (content, finish_reason) for a successful request."""
+        if not draw["is_code"]:
+            return TASK_TEMPLATE.format(params="learning_rate, window_size"), "stop"
+
+        # continuation of a previously truncated reply
+        prior = [m.get("content", "") for m in payload.get("messages", [])
+                 if m.get("role") == "assistant"]
+        with self._lock:
+            rest = self._pending.pop(prior[-1], None) if prior else None
+        if rest is not None:
+            return rest, "stop"
+
+        if draw["outcome"] == "invalid":
+            return draw["invalid"], "stop"
+        code = VALID_POLICY_TEMPLATE.format(
+            threshold=draw["threshold"], rate=draw["rate"]
+        )
+        if draw["outcome"] == "truncated":
+            head, tail = code[: len(code) // 2], code[len(code) // 2:]
+            with self._lock:
+                self._pending[head] = tail
+            return head, "length"
+        return code, "stop"
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, fmt, *args):  # silence stderr access log
+                pass
+
+            def _reply(self, status: int, body: Dict[str, Any]) -> None:
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                try:
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # client gave up (timeout) – expected
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                try:
+                    payload = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    return self._reply(400, {"error": {"message": "bad json"}})
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    return self._reply(404, {"error": {"message": "not found"}})
+
+                draw = server._draw(payload.get("model", ""))
+                # logged up front so hung requests are counted even if the
+                # harness stops before they complete
+                with server._lock:
+                    server.log.append(dict(
+                        model=draw["model"],
+                        outcome=draw["outcome"],
+                        latency_s=draw["latency"],
+                    ))
+                time.sleep(draw["latency"])
+
+                if draw["outcome"] == "rate_limited":
+                    self._reply(429, {"error": {"message": "rate limited", "code": 429}})
+                elif draw["outcome"] == "error":
+                    self._reply(500, {"error": {"message": "upstream error", "code": 500}})
+                else:
+                    content, finish_reason = server._content(draw, payload)
+                    self._reply(200, {
+                        "id": "fake-%d" % len(server.log),
+                        "model": draw["model"],
+                        "choices": [{
+                            "index": 0,
+                            "finish_reason": finish_reason,
+                            "message": {"role": "assistant", "content": content},
+                        }],
+                    })
+
+        return Handler
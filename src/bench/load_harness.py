@@ -0,0 +1,290 @@
+# File: src/bench/load_harness.py
+"""
+End-to-end load harness against a fake OpenRouter server.
+
+Starts ``FakeOpenRouter`` locally, points ``OPENROUTER_BASE_URL`` at it
+and drives either ``run_nested_algorithm`` (in-process, one thread per
+concurrent run) or ``python -m src.main --save-only`` (one subprocess per
+run).  Reports meta-steps per minute (successful ``meta_update`` calls),
+tail latencies of successful and failed ``meta_update`` calls and of the
+served LLM calls, and the outcome mix.
+
+Usage
+-----
+python -m src.bench.load_harness --runs 20 --concurrency 4 \\
+    --latency lognormal:2.0,0.5 --code-latency lognormal:0.8,0.4 \\
+    --invalid-rate 0.2 --rate-limit-rate 0.02 --timeout-rate 0.01 \\
+    --task-timeout 3 --code-timeout 2
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from src.bench.fake_openrouter import FakeOpenRouter
+
+logger = logging.getLogger(__name__)
+
+
+def _tail(samples: Sequence[float]) -> Dict[str, float]:
+    if not samples:
+        return {}
+    a = np.asarray(samples, dtype=float)
+    return dict(
+        n=int(a.size),
+        mean=float(a.mean()),
+        p50=float(np.percentile(a, 50)),
+        p90=float(np.percentile(a, 90)),
+        p99=float(np.percentile(a, 99)),
+        max=float(a.max()),
+    )
+
+
+def _purge_project_modules() -> None:
+    """
+    Drop config/src modules (but not this package) so the next import
+    re-reads the environment; config freezes OPENROUTER_BASE_URL.
+    """
+    for name in list(sys.modules):
+        if name == "config" or (name.startswith("src.") and not name.startswith("src.bench")):
+            del sys.modules[name]
+
+
+def _client_timeout() -> float:
+    """Longest request timeout the LLM clients are configured with."""
+    from src.codegen import code_generator_qwen, task_generator
+    return max(task_generator.OPENROUTER_TIMEOUT, code_generator_qwen.OPENROUTER_CODE_TIMEOUT)
+
+
+# ------------------------------------------------------------------
+def _run_nested(runs: int, concurrency: int) -> Dict[str, Any]:
+    """
+    Run ``run_nested_algorithm`` ``runs`` times with ``concurrency``
+    threads, timing every ``meta_update`` call; calls that raise are
+    timed and counted separately.
+    """
+    # Imported late (after the purge): config reads OPENROUTER_BASE_URL at import time
+    import src.algorithm.nested_algorithm as na
+
+    meta_lat: List[float] = []
+    failed_lat: List[float] = []
+    lock = threading.Lock()
+    inner = na.meta_update
+
+    def timed_meta_update(*args, **kwargs):
+        t0 = time.perf_counter()
+        samples = failed_lat
+        try:
+            out = inner(*args, **kwargs)
+            samples = meta_lat
+            return out
+        finally:
+            with lock:
+                samples.append(time.perf_counter() - t0)
+
+    na.meta_update = timed_meta_update
+
+    def one_run(i: int) -> str | None:
+        try:
+            na.run_nested_algorithm()
+            return None
+        except Exception as e:
+            logger.warning("Run %d failed: %s: %s", i, type(e).__name__, e)
+            return type(e).__name__
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            failures = [f for f in pool.map(one_run, range(runs)) if f]
+    finally:
+        na.meta_update = inner
+
+    return dict(
+        meta_update_latencies=meta_lat,
+        failed_meta_update_latencies=failed_lat,
+        failures=failures,
+    )
+
+
+def _run_main(runs: int, concurrency: int, env: Dict[str, str]) -> Dict[str, Any]:
+    """Run ``python -m src.main --save-only`` as ``runs`` subprocesses."""
+    root = Path(__file__).resolve().parents[2]
+    run_lat: List[float] = []
+    lock = threading.Lock()
+
+    def one_run(i: int) -> str | None:
+        t0 = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-m", "src.main", "--save-only"],
+            cwd=root, env=env, capture_output=True, text=True,
+        )
+        with lock:
+            run_lat.append(time.perf_counter() - t0)
+        if proc.returncode != 0:
+            last = (proc.stderr.strip().splitlines() or ["?"])[-1]
+            logger.warning("Run %d failed: %s", i, last)
+            return last
+        return None
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        failures = [f for f in pool.map(one_run, range(runs)) if f]
+    return dict(run_latencies=run_lat, failures=failures)
+
+
+# ------------------------------------------------------------------
+def run_harness(
+    *,
+    target: str = "nested",
+    runs: int = 4,
+    concurrency: int = 1,
+    task_timeout: float | None = None,
+    code_timeout: float | None = None,
+    backoff: float | None = None,
+    hang_s: float | None = None,
+    **server_kwargs: Any,
+) -> Dict[str, Any]:
+    """
+    Start the fake server, drive ``target`` at the given scale and return
+    a report dict (also suitable for ``json.dumps``).
+
+    Hung requests must outlast the client timeout to surface as timeouts:
+    ``hang_s`` defaults to one second more than the longest configured
+    timeout and a smaller value raises ValueError.  ``config`` and the
+    ``src`` modules are re-imported on every call and the environment is
+    restored afterwards, so the harness can run repeatedly in one process.
+    """
+    server_kwargs.setdefault(
+        "code_model",
+        os.getenv("MODEL_QWEN", "qwen/qwen-2.5-coder-32b-instruct"),
+    )
+    saved_env = dict(os.environ)
+    with FakeOpenRouter(**server_kwargs) as srv:
+        env_overrides = {
+            "OPENROUTER_BASE_URL": srv.base_url,
+            "OPENROUTER_API_KEY": os.getenv("OPENROUTER_API_KEY") or "fake-key",
+        }
+        if task_timeout is not None:
+            env_overrides["OPENROUTER_TIMEOUT"] = str(task_timeout)
+        if code_timeout is not None:
+            env_overrides["OPENROUTER_CODE_TIMEOUT"] = str(code_timeout)
+        if backoff is not None:
+            env_overrides["OPENROUTER_BACKOFF"] = str(backoff)
+        try:
+            # load_dotenv() never overrides variables that are already set
+            os.environ.update(env_overrides)
+            _purge_project_modules()
+
+            timeout = _client_timeout()
+            if hang_s is None:
+                hang_s = timeout + 1.0
+            elif hang_s <= timeout:
+                raise ValueError(
+                    f"hang_s={hang_s:g}s does not exceed the client timeout "
+                    f"({timeout:g}s); hung requests would succeed instead of timing out"
+                )
+            srv.hang_s = hang_s
+
+            t0 = time.perf_counter()
+            if target == "nested":
+                out = _run_nested(runs, concurrency)
+            elif target == "main":
+                out = _run_main(runs, concurrency, dict(os.environ))
+            else:
+                raise ValueError(f"Unknown target {target!r} (expected 'nested' or 'main')")
+            wall = time.perf_counter() - t0
+            served = list(srv.log)
+
+            if "meta_update_latencies" in out:
+                meta_steps = len(out["meta_update_latencies"])
+            else:
+                from config import META_STEPS
+                ok_runs = runs - len(out["failures"])
+                meta_steps = ok_runs * max(META_STEPS - 1, 0)  # V=0 has no meta-update
+        finally:
+            os.environ.clear()
+            os.environ.update(saved_env)
+
+    by_model: Dict[str, List[float]] = {}
+    for rec in served:
+        by_model.setdefault(rec["model"], []).append(rec["latency_s"])
+
+    report: Dict[str, Any] = dict(
+        target=target,
+        runs=runs,
+        concurrency=concurrency,
+        failed_runs=len(out["failures"]),
+        failure_kinds=dict(Counter(out["failures"])),
+        wall_s=wall,
+        meta_steps=meta_steps,
+        meta_steps_per_min=meta_steps / wall * 60.0 if wall > 0 else 0.0,
+        requests=len(served),
+        outcomes=dict(Counter(r["outcome"] for r in served)),
+        server_latency={m: _tail(v) for m, v in by_model.items()},
+    )
+    if "meta_update_latencies" in out:
+        report["meta_update_latency"] = _tail(out["meta_update_latencies"])
+        report["meta_update_failed"] = len(out["failed_meta_update_latencies"])
+        report["meta_update_failed_latency"] = _tail(out["failed_meta_update_latencies"])
+    if "run_latencies" in out:
+        report["run_latency"] = _tail(out["run_latencies"])
+    report["hang_s"] = hang_s
+    return report
+
+
+# ------------------------------------------------------------------
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    p.add_argument("--target", choices=["nested", "main"], default="nested")
+    p.add_argument("--runs", type=int, default=4)
+    p.add_argument("--concurrency", type=int, default=1)
+    p.add_argument("--latency", default="const:0.05",
+                   help="planning-call latency spec, e.g. lognormal:2.0,0.5")
+    p.add_argument("--code-latency", default=None,
+                   help="code-call latency spec (defaults to --latency)")
+    p.add_argument("--invalid-rate", type=float, default=0.0)
+    p.add_argument("--truncate-rate", type=float, default=0.0)
+    p.add_argument("--error-rate", type=float, default=0.0)
+    p.add_argument("--rate-limit-rate", type=float, default=0.0)
+    p.add_argument("--timeout-rate", type=float, default=0.0)
+    p.add_argument("--hang-s", type=float, default=None,
+                   help="duration of hung requests (default: client timeout + 1 s)")
+    p.add_argument("--task-timeout", type=float, default=None)
+    p.add_argument("--code-timeout", type=float, default=None)
+    p.add_argument("--backoff", type=float, default=None)
+    p.add_argument("--seed", type=int, default=None)
+    p.add_argument("--json-out", type=Path, default=None)
+    args = p.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s | %(message)s")
+    report = run_harness(
+        target=args.target,
+        runs=args.runs,
+        concurrency=args.concurrency,
+        task_timeout=args.task_timeout,
+        code_timeout=args.code_timeout,
+        backoff=args.backoff,
+        latency=args.latency,
+        code_latency=args.code_latency,
+        invalid_rate=args.invalid_rate,
+        truncate_rate=args.truncate_rate,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        timeout_rate=args.timeout_rate,
+        hang_s=args.hang_s,
+        seed=args.seed,
+    )
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.json_out:
+        args.json_out.write_text(text)
@@ -4,7 +4,10 @@ from __future__ import annotations
 
 import json
 import logging
+import os
 import re
+from typing import Dict, List, Tuple
+
 import requests
 from requests.exceptions import HTTPError, RequestException
 
@@ -15,33 +18,61 @@ from config import (
     CODE_TEMPERATURE,
     CODE_MAX_TOKENS,
 )
+from src.codegen.llm_cache import cache_get, cache_put
 
 logger = logging.getLogger(__name__)
 
+class CodeGenAPIError(RuntimeError):
+    """OpenRouter answered the code request with an HTTP error or an unparsable body."""
 
-def generate_policy_code(
-    task_prompt: str,
-    *,
-    temperature: float = CODE_TEMPERATURE,
-    max_tokens: int = CODE_MAX_TOKENS,
-) -> str:
-    """Return pure Python code implementing the requested policy via OpenRouter."""
-    system_msg = {
-        "role": "system",
-        "content": (
-            "You are a senior Python engineer. "
-            "Return ONLY valid Python 3 code for the requested class."
-        ),
-    }
-    user_msg = {"role": "user", "content": task_prompt}
 
+# default 60 s; override via .env → OPENROUTER_CODE_TIMEOUT=120
+OPENROUTER_CODE_TIMEOUT = float(os.getenv("OPENROUTER_CODE_TIMEOUT", "60"))
+
+
+# how many "continue" rounds a truncated (finish_reason=length) reply gets
+CODE_MAX_CONTINUATIONS = int(os.getenv("CODE_MAX_CONTINUATIONS", "2"))
+
+SYSTEM_MSG = {
+    "role": "system",
+    "content": (
+        "You are a senior Python engineer. "
+        "Return ONLY valid Python 3 code for the requested class."
+    ),
+}
+
+CONTINUE_MSG = {
+    "role": "user",
+    "content": (
+        "Your reply was cut off. Continue the code exactly where it stopped. "
+        "Do not repeat anything and do not add commentary or code fences."
+    ),
+}
+
+
+def _chat(
+    messages: List[Dict[str, str]],
+    temperature: float,
+    max_tokens: int,
+    use_cache: bool = True,
+) -> Tuple[str, str]:
+    """
+    POST one chat completion; return (content, finish_reason).
+    Only deterministic (temperature 0) calls go through the LLM cache.
+    """
     payload = {
         "model": MODEL_QWEN,
-        "messages": [system_msg, user_msg],
+        "messages": messages,
         "max_tokens": max_tokens,
         "temperature": temperature,
     }
 
+    use_cache = use_cache and temperature == 0
+    if use_cache:
+        cached = cache_get(payload)
+        if cached is not None:
+            return cached["content"], cached["finish_reason"]
+
     url = f"{OPENROUTER_BASE_URL}/chat/completions"
     resp = requests.post(
         url,
@@ -50,7 +81,7 @@ def generate_policy_code(
             "Content-Type": "application/json",
         },
         data=json.dumps(payload),
-        timeout=60,
+        timeout=OPENROUTER_CODE_TIMEOUT,
     )
 
     try:
@@ -66,21 +97,96 @@ def generate_policy_code(
             resp.status_code,
             err_body,
         )
-        raise RuntimeError(
+        raise CodeGenAPIError(
             f"OpenRouter code-generation failed with status {resp.status_code}: {err_body}"
         ) from http_err
 
     # parse out the raw code text
     try:
-        raw = resp.json()["choices"][0]["message"]["content"].strip()
+        choice = resp.json()["choices"][0]
+        raw = choice["message"]["content"]
     except (KeyError, IndexError, ValueError) as parse_err:
         logger.error("Unexpected response format from OpenRouter: %s", resp.text)
-        raise RuntimeError(f"Failed to parse code-generation response: {resp.text}") from parse_err
+        raise CodeGenAPIError(f"Failed to parse code-generation response: {resp.text}") from parse_err
+
+    finish_reason = choice.get("finish_reason") or "stop"
+    if use_cache:
+        cache_put(payload, {"content": raw, "finish_reason": finish_reason})
+    return raw, finish_reason
+
+
+def _complete(
+    messages: List[Dict[str, str]],
+    temperature: float,
+    max_tokens: int,
+    use_cache: bool = True,
+) -> str:
+    """
+    Run ``_chat`` and, while the reply is truncated at ``max_tokens``
+    (finish_reason == "length"), ask the model to continue instead of
+    starting over.  Returns the stitched, fence-free code.
+    """
+    messages = list(messages)
+    parts: List[str] = []
+    for rnd in range(CODE_MAX_CONTINUATIONS + 1):
+        raw, finish_reason = _chat(messages, temperature, max_tokens, use_cache)
+        parts.append(raw)
+        if finish_reason != "length":
+            break
+        logger.info(
+            "Code reply truncated at max_tokens=%d; continuation %d/%d",
+            max_tokens, rnd + 1, CODE_MAX_CONTINUATIONS,
+        )
+        messages += [{"role": "assistant", "content": raw}, CONTINUE_MSG]
 
     # Remove any Markdown code-fence lines anywhere in the block
-    lines = raw.splitlines()
+    lines = "".join(parts).strip().splitlines()
     filtered_lines = [line for line in lines if not re.match(r"^\s*```", line)]
     code = "\n".join(filtered_lines)
 
     # Strip leading/trailing whitespace
     return code.strip()
+
+
+def generate_policy_code(
+    task_prompt: str,
+    *,
+    temperature: float = CODE_TEMPERATURE,
+    max_tokens: int = CODE_MAX_TOKENS,
+    use_cache: bool = True,
+) -> str:
+    """
+    Return pure Python code implementing the requested policy via OpenRouter.
+    ``use_cache=False`` forces a fresh sample even at temperature 0.
+    """
+    user_msg = {"role": "user", "content": task_prompt}
+    return _complete([SYSTEM_MSG, user_msg], temperature, max_tokens, use_cache)
+
+
+def repair_policy_code(
+    task_prompt: str,
+    rejected_code: str,
+    error: str,
+    *,
+    temperature: float = CODE_TEMPERATURE,
+    max_tokens: int = CODE_MAX_TOKENS,
+) -> str:
+    """
+    Ask the Code Generator to fix ``rejected_code`` given the exact ϑ
+    error, reusing the previous task prompt (no Task Generator call).
+    """
+    messages = [
+        SYSTEM_MSG,
+        {"role": "user", "content": task_prompt},
+        {"role": "assistant", "content": rejected_code},
+        {
+            "role": "user",
+            "content": (
+                "The code above was rejected by the safety/signature filter with:\n"
+                f"{error.strip()}\n\n"
+                "Return the corrected class in full. Keep everything that was "
+                "not part of the problem unchanged."
+            ),
+        },
+    ]
+    return _complete(messages, temperature, max_tokens)
@@ -0,0 +1,47 @@
+# File: src/codegen/llm_cache.py
+"""
+On-disk cache of LLM responses keyed by the exact request payload.
+
+Shared by every process that points LLM_CACHE_DIR at the same directory
+(e.g. the jobs of a manifest run), so identical prompts are paid for
+once.  Disabled when LLM_CACHE_DIR is empty.
+
+Only replies that may be replayed are stored: Task Generator and Code
+Generator calls at temperature 0.  Sampled calls always reach the API,
+otherwise every re-plan and every sample (and so every raced candidate)
+would be the first cached answer.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict
+
+from config import LLM_CACHE_DIR
+from src.utils.atomic_write import atomic_write
+
+
+def _path(payload: Dict[str, Any]) -> Path:
+    key = hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+    return Path(LLM_CACHE_DIR) / key[:2] / f"{key}.json"
+
+
+def cache_get(payload: Dict[str, Any]) -> Dict[str, Any] | None:
+    if not LLM_CACHE_DIR:
+        return None
+    try:
+        return json.loads(_path(payload).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def cache_put(payload: Dict[str, Any], value: Dict[str, Any]) -> None:
+    if not LLM_CACHE_DIR:
+        return
+    data = json.dumps(value).encode()
+    try:
+        # atomic: readers never see half a file
+        atomic_write(_path(payload), lambda f: f.write(data))
+    except OSError:
+        pass  # a failed cache write must not fail the LLM call
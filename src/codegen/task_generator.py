@@ -19,17 +19,28 @@ from config import (
     MODEL_DEEPSEEK,
     TASK_TEMPERATURE,
     TASK_MAX_TOKENS,
+    FEATURE_WINDOWS,
 )
+from src.codegen.llm_cache import cache_get, cache_put
+from src.data.feature_store import feature_names
 
 # default 180 s; override via .env → OPENROUTER_TIMEOUT=240
-OPENROUTER_TIMEOUT = int(os.getenv("OPENROUTER_TIMEOUT", "180"))
+OPENROUTER_TIMEOUT = float(os.getenv("OPENROUTER_TIMEOUT", "180"))
+# initial back-off after a read timeout, doubled on every retry
+OPENROUTER_BACKOFF = float(os.getenv("OPENROUTER_BACKOFF", "5"))
 
 
 def _post_with_retry(payload: dict, retries: int = 3) -> str:
     """
     Call OpenRouter chat endpoint with exponential back-off on ReadTimeout.
+    Only deterministic (temperature 0) calls go through the LLM cache.
     """
-    delay = 5  # seconds
+    use_cache = payload.get("temperature") == 0
+    cached = cache_get(payload) if use_cache else None
+    if cached is not None:
+        return cached["content"]
+
+    delay = OPENROUTER_BACKOFF  # seconds
     url = f"{OPENROUTER_BASE_URL}/chat/completions"
 
     for attempt in range(1, retries + 1):
@@ -44,7 +55,10 @@ def _post_with_retry(payload: dict, retries: int = 3) -> str:
                 timeout=OPENROUTER_TIMEOUT,
             )
             resp.raise_for_status()
-            return resp.json()["choices"][0]["message"]["content"].strip()
+            content = resp.json()["choices"][0]["message"]["content"].strip()
+            if use_cache:
+                cache_put(payload, {"content": content})
+            return content
 
         except ReadTimeout:
             print(
@@ -74,6 +88,7 @@ def build_task_prompt(
     Ensures no import statements and default values for all __init__ parameters.
     Falls back to a stub prompt if OpenRouter keeps timing out.
     """
+    features = ", ".join(feature_names(FEATURE_WINDOWS))
     sys_prompt = (
         "You are a planning agent (Task Generator). "
         "Your output must be a prompt for another LLM that writes pure Python code. "
@@ -94,6 +109,12 @@ def build_task_prompt(
         ## Meta-parameters T_Q ##
         {meta_params}
 
+        ## Precomputed features (per step, read-only) ##
+        {features}
+        `{{s}}_mean_W`, `{{s}}_min_W`, `{{s}}_max_W`, `{{s}}_z_W`, `{{s}}_rank_W` are trailing
+        statistics over the last W steps (including the current one) of s = price or demand;
+        `time_of_day` and `day_of_week` are step indexes.
+
         ----
         Craft a concise *task description* asking the code-generation model to emit
         exactly one class `GeneratedPolicy` in a Python code block, with:
@@ -102,6 +123,10 @@ def build_task_prompt(
             each with a default literal value (e.g. `learning_rate: float = 0.01`).
           • A `take_action(self, state_of_charge: float, imported_energy: float, market_price: float, cost: float) -> float`
             method matching Appendix C.3, without any import statements (including `numpy`).
+          • Optionally, use the precomputed features instead of keeping a price history: the class
+            sets the attribute `uses_features = True` and adds the wanted feature names from the
+            list above as extra `take_action` parameters after `cost`
+            (e.g. `..., cost: float, price_mean_24: float) -> float`).
 
         Do NOT include any import lines in the generated code. Provide only the Python class definition.
         """
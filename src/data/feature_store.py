@@ -0,0 +1,198 @@
+#/Users/nashe/nested_policy_pipeline/src/data/feature_store.py
+"""
+Per-series feature store.
+
+All trailing-window statistics for a price/demand pair are computed in
+one vectorised pass and cached on disk, keyed by a hash of the series and
+the feature settings.  ``BatteryEnvironment`` then serves a read-only
+feature row by step index, so policies no longer rescan their own price
+history on every step.
+
+Usage
+-----
+from src.data.feature_store import load_features
+
+fs  = load_features(prices, demand, windows=(24,))
+row = fs.row(10)                      # read-only np.ndarray
+avg = row[fs.index("price_mean_24")]
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+
+from src.utils.atomic_write import atomic_write
+
+# bump when the feature definitions change so stale caches are ignored
+FEATURE_VERSION = 2
+
+
+class FeatureStore:
+    """
+    Dense ``(n_steps, n_features)`` matrix plus column names.
+    The matrix is marked read-only; rows are views, not copies.
+    """
+
+    def __init__(self, names: Sequence[str], matrix: np.ndarray):
+        if matrix.ndim != 2 or matrix.shape[1] != len(names):
+            raise ValueError("matrix must be 2-D with one column per name")
+        self.names: Tuple[str, ...] = tuple(names)
+        self._col = {n: j for j, n in enumerate(self.names)}
+        self.matrix = np.ascontiguousarray(matrix, dtype=float)
+        self.matrix.flags.writeable = False
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    def index(self, name: str) -> int:
+        return self._col[name]
+
+    def row(self, i: int) -> np.ndarray:
+        return self.matrix[i]
+
+    def column(self, name: str) -> np.ndarray:
+        return self.matrix[:, self._col[name]]
+
+
+# ------------------------------------------------------------------
+# Vectorised trailing-window statistics
+# ------------------------------------------------------------------
+def _trailing_windows(x: np.ndarray, window: int) -> np.ndarray:
+    """(n, window) view of trailing windows, NaN-padded before t=0."""
+    padded = np.concatenate([np.full(window - 1, np.nan), x])
+    return np.lib.stride_tricks.sliding_window_view(padded, window)
+
+
+def _rolling_stats(x: np.ndarray, window: int) -> Dict[str, np.ndarray]:
+    """
+    Trailing mean/min/max/z-score/percentile rank over ``window`` steps,
+    including the current one.  Early steps use the partial history.
+
+    The mean sums each window oldest-first (``cumsum`` along the window
+    is sequential), so it is bit-identical to ``sum(window) / len`` over
+    the same prices; a running-sum difference is not, and flips
+    ``price < mean`` comparisons on flat prices.
+    """
+    n = x.size
+    count = np.minimum(np.arange(1, n + 1), window).astype(float)
+
+    win   = _trailing_windows(x, window)
+    mean  = np.cumsum(np.nan_to_num(win, nan=0.0), axis=1)[:, -1] / count
+    csum2 = np.concatenate([[0.0], np.cumsum(x * x)])
+    hi    = np.arange(1, n + 1)
+    lo    = np.maximum(hi - window, 0)
+    var   = np.maximum((csum2[hi] - csum2[lo]) / count - mean * mean, 0.0)
+    std   = np.sqrt(var)
+    z     = np.divide(x - mean, std, out=np.zeros(n), where=std > 1e-12)
+
+    with np.errstate(invalid="ignore"):
+        rmin = np.nanmin(win, axis=1)
+        rmax = np.nanmax(win, axis=1)
+        rank = (win <= x[:, None]).sum(axis=1) / count
+
+    return dict(mean=mean, min=rmin, max=rmax, z=z, rank=rank)
+
+
+_STATS = ("mean", "min", "max", "z", "rank")
+
+
+def feature_names(windows: Sequence[int] = (24,)) -> Tuple[str, ...]:
+    """Column names ``compute_features`` produces for ``windows``, in order."""
+    names = [
+        f"{label}_{stat}_{w}"
+        for w in windows
+        for label in ("price", "demand")
+        for stat in _STATS
+    ]
+    return tuple(names + ["time_of_day", "day_of_week"])
+
+
+def compute_features(
+    price_series: Sequence[float],
+    demand_series: Sequence[float],
+    *,
+    windows: Sequence[int] = (24,),
+    steps_per_day: int = 24,
+) -> FeatureStore:
+    """
+    Build the feature matrix for one price/demand pair.
+
+    Columns, for each ``w`` in ``windows`` and ``s`` in (price, demand):
+        {s}_mean_{w}, {s}_min_{w}, {s}_max_{w}, {s}_z_{w}, {s}_rank_{w}
+    followed by ``time_of_day`` and ``day_of_week`` step indexes.
+    """
+    price  = np.asarray(price_series,  dtype=float)
+    demand = np.asarray(demand_series, dtype=float)
+    n = min(price.size, demand.size)
+    price, demand = price[:n], demand[:n]
+
+    cols: list[np.ndarray] = []
+    for w in windows:
+        if w < 1:
+            raise ValueError("feature windows must be >= 1")
+        for x in (price, demand):
+            stats = _rolling_stats(x, int(w))
+            cols += [stats[stat] for stat in _STATS]
+
+    t = np.arange(n)
+    cols += [(t % steps_per_day).astype(float),
+             ((t // steps_per_day) % 7).astype(float)]
+
+    return FeatureStore(feature_names(windows), np.column_stack(cols))
+
+
+# ------------------------------------------------------------------
+# Disk cache
+# ------------------------------------------------------------------
+def series_hash(
+    price_series: Sequence[float],
+    demand_series: Sequence[float],
+    windows: Sequence[int],
+    steps_per_day: int,
+) -> str:
+    h = hashlib.sha1()
+    h.update(np.asarray(price_series, dtype=float).tobytes())
+    h.update(b"|")
+    h.update(np.asarray(demand_series, dtype=float).tobytes())
+    h.update(f"|{tuple(windows)}|{steps_per_day}|v{FEATURE_VERSION}".encode())
+    return h.hexdigest()
+
+
+def load_features(
+    price_series: Sequence[float],
+    demand_series: Sequence[float],
+    *,
+    windows: Sequence[int] = (24,),
+    steps_per_day: int = 24,
+    cache_dir: str | os.PathLike | None = ".cache/features",
+) -> FeatureStore:
+    """
+    Return the feature store for this series pair, computing and caching
+    it under ``cache_dir/<hash>.npz`` on first use.  ``cache_dir=None``
+    disables the disk cache.
+    """
+    if cache_dir is None:
+        return compute_features(
+            price_series, demand_series, windows=windows, steps_per_day=steps_per_day
+        )
+
+    path = Path(cache_dir) / (
+        series_hash(price_series, demand_series, windows, steps_per_day) + ".npz"
+    )
+    if path.exists():
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                return FeatureStore([str(n) for n in data["names"]], data["matrix"])
+        except (OSError, ValueError, KeyError):
+            pass  # corrupt / partial file → recompute
+
+    fs = compute_features(
+        price_series, demand_series, windows=windows, steps_per_day=steps_per_day
+    )
+    # atomic: concurrent runs and threads never see half a file
+    atomic_write(path, lambda f: np.savez(f, names=np.array(fs.names), matrix=fs.matrix))
+    return fs
@@ -12,8 +12,13 @@ prices  = generate_price_series(horizon=150, seed=42)
 demand  = constant_demand(horizon=150, level=5.0)
 """
 from __future__ import annotations
+import os
+from pathlib import Path
+
 import numpy as np
 
+from src.utils.atomic_write import atomic_write
+
 
 def generate_price_series(
     horizon: int,
@@ -49,6 +54,31 @@ def generate_price_series(
     return prices.tolist()
 
 
+def cached_price_series(
+    horizon: int,
+    *,
+    seed: int | None = 42,
+    cache_dir: str | os.PathLike | None = None,
+) -> list[float]:
+    """
+    ``generate_price_series`` backed by an on-disk cache shared by
+    concurrent runs (``cache_dir=None`` → no cache).
+    """
+    if cache_dir is None or seed is None:
+        return generate_price_series(horizon, seed=seed)
+
+    path = Path(cache_dir) / f"price_h{horizon}_s{seed}.npy"
+    if path.exists():
+        try:
+            return np.load(path).tolist()
+        except (OSError, ValueError):
+            pass  # corrupt / partial file → regenerate
+
+    prices = generate_price_series(horizon, seed=seed)
+    atomic_write(path, lambda f: np.save(f, np.asarray(prices)))
+    return prices
+
+
 def constant_demand(horizon: int, *, level: float = 5.0) -> list[float]:
     """
     Flat demand line used in the paper.
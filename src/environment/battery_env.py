@@ -1,22 +1,42 @@
 #/Users/nashe/nested_policy_pipeline/src/environment/battery_env.py
+from __future__ import annotations
 import numpy as np
 from config import (
     HORIZON,
     PRICE_SERIES,
     DEMAND_SERIES,
     INITIAL_SOC,
+    FEATURE_WINDOWS,
+    STEPS_PER_DAY,
+    FEATURE_CACHE_DIR,
 )
 from src.utils.transition import transition        # ← fixed prefix
+from src.data.feature_store import FeatureStore, load_features
+from src.utils.tariff import DEFAULT_TARIFF, Tariff, TariffDefault, resolve_tariff
 
 
 class BatteryEnvironment:
     """
     State vector = [soc, imported_energy, market_price, cost, demand]
+
+    Precomputed per-series features (rolling stats, time indexes) are
+    served read-only via ``feature_row`` / ``observation``.
+
+    ``tariff`` (default: from TARIFF_* settings) bills each step through
+    an incremental ``TariffState``; ``None`` keeps market-price billing.
     """
 
-    def __init__(self):
+    def __init__(self, tariff: Tariff | TariffDefault | None = DEFAULT_TARIFF):
+        self.tariff = resolve_tariff(tariff)
         self.price_series  = np.array(PRICE_SERIES,  dtype=float)
         self.demand_series = np.array(DEMAND_SERIES, dtype=float)
+        self.features: FeatureStore = load_features(
+            self.price_series,
+            self.demand_series,
+            windows=FEATURE_WINDOWS,
+            steps_per_day=STEPS_PER_DAY,
+            cache_dir=FEATURE_CACHE_DIR or None,
+        )
         self.reset()
 
     # -----------------------------------------------------------------
@@ -24,6 +44,7 @@ class BatteryEnvironment:
     # -----------------------------------------------------------------
     def reset(self) -> np.ndarray:
         self.step_index = 0
+        self.billing = self.tariff.new_state() if self.tariff is not None else None
         self.state = np.array(
             [
                 INITIAL_SOC,          # soc
@@ -40,6 +61,16 @@ class BatteryEnvironment:
         next_price  = self.price_series[self.step_index + 1]
         next_demand = self.demand_series[self.step_index + 1]
 
-        self.state = transition(self.state, action, next_price, next_demand)
+        self.state = transition(
+            self.state, action, next_price, next_demand, self.billing
+        )
         self.step_index += 1
         return self.state
+
+    def feature_row(self, index: int | None = None) -> np.ndarray:
+        """Read-only feature row for ``index`` (default: current step)."""
+        return self.features.row(self.step_index if index is None else index)
+
+    def observation(self) -> np.ndarray:
+        """State vector followed by the current feature row."""
+        return np.concatenate([self.state, self.feature_row()])
@@ -1,14 +1,15 @@
 #/Users/nashe/nested_policy_pipeline/src/main.py
 """
 Entry-point script.
+
+python -m src.main [--save-only]
+python -m src.main --manifest jobs.yaml [--workers 4] [--out-dir results]
 """
 from __future__ import annotations
 import argparse
 import logging
 from pathlib import Path
-from typing import List
-
-import matplotlib.pyplot as plt
+from typing import Any, Dict, List
 
 from src.algorithm.nested_algorithm import run_nested_algorithm
 from src.environment.battery_env import BatteryEnvironment
@@ -24,7 +25,33 @@ def run_baseline() -> float:
     return float(state[3])
 
 
+def run_experiment() -> Dict[str, Any]:
+    """Baseline + nested pipeline for the current config."""
+    logging.info("▶ Baseline run (battery off)…")
+    baseline_cost = run_baseline()
+    logging.info("Baseline cost  : %.3f", baseline_cost)
+
+    logging.info("▶ Nested-policy pipeline…")
+    results = run_nested_algorithm()
+    seg_costs = [seg["segment_cost"] for seg in results["per_segment"]]
+
+    # ---- FIXED line (removed stray backslashes) ----
+    savings_pct = [(baseline_cost - c) / baseline_cost * 100 for c in seg_costs]
+    logging.info("Segment savings (%%): %s",
+                 [f"{s:.1f}" for s in savings_pct])
+    # -----------------------------------------------
+
+    return dict(
+        baseline_cost=baseline_cost,
+        segment_costs=seg_costs,
+        savings_pct=savings_pct,
+        final_cost=float(results["final_state"][3]),
+    )
+
+
 def plot_savings(savings: List[float], out: Path | None = None) -> None:
+    import matplotlib.pyplot as plt  # heavy; only needed when plotting
+
     iters = list(range(1, len(savings) + 1))
     plt.figure(figsize=(6, 3))
     plt.plot(iters, savings, marker="o", markerfacecolor="white")
@@ -44,19 +71,7 @@ def plot_savings(savings: List[float], out: Path | None = None) -> None:
 def main(save_only: bool = False) -> None:
     logging.basicConfig(level=logging.INFO, format="%(levelname)s | %(message)s")
 
-    logging.info("▶ Baseline run (battery off)…")
-    baseline_cost = run_baseline()
-    logging.info("Baseline cost  : %.3f", baseline_cost)
-
-    logging.info("▶ Nested-policy pipeline…")
-    results = run_nested_algorithm()
-    seg_costs = [seg["segment_cost"] for seg in results["per_segment"]]
-
-    # ---- FIXED line (removed stray backslashes) ----
-    savings_pct = [(baseline_cost - c) / baseline_cost * 100 for c in seg_costs]
-    logging.info("Segment savings (%%): %s",
-                 [f"{s:.1f}" for s in savings_pct])
-    # -----------------------------------------------
+    savings_pct = run_experiment()["savings_pct"]
 
     fig_path = Path("fig_cost_savings.png")
     plot_savings(savings_pct, fig_path if save_only else None)
@@ -66,5 +81,16 @@ def main(save_only: bool = False) -> None:
 if __name__ == "__main__":
     p = argparse.ArgumentParser()
     p.add_argument("--save-only", action="store_true")
+    p.add_argument("--manifest", type=Path, default=None,
+                   help="YAML/JSON list of configurations to run as a batch")
+    p.add_argument("--workers", type=int, default=None,
+                   help="process-pool size for --manifest (default: CPU count)")
+    p.add_argument("--out-dir", type=Path, default=Path("results"),
+                   help="where --manifest writes results, logs and caches")
     args = p.parse_args()
-    main(save_only=args.save_only)
+    if args.manifest:
+        from src.batch import run_manifest
+        logging.basicConfig(level=logging.INFO, format="%(levelname)s | %(message)s")
+        run_manifest(args.manifest, out_dir=args.out_dir, workers=args.workers)
+    else:
+        main(save_only=args.save_only)
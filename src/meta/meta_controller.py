@@ -7,18 +7,34 @@ from __future__ import annotations
 
 import inspect
 import logging
-from typing import Dict, Any, Tuple
+import threading
+from typing import Dict, Any, List, Tuple
 
 import requests
 from requests.exceptions import RequestException
 
 from src.codegen.task_generator import build_task_prompt
-from src.codegen.code_generator_qwen import generate_policy_code
+from src.codegen.code_generator_qwen import (
+    CodeGenAPIError,
+    generate_policy_code,
+    repair_policy_code,
+)
 from src.utils.filter import vartheta
+from src.algorithm.racing import race_candidates
+from config import RACE_CANDIDATES, META_MAX_REPAIRS
 
 logger = logging.getLogger(__name__)
 
 
+class MetaUpdateCancelled(RuntimeError):
+    """Raised when a background meta-update is cancelled between LLM calls."""
+
+
+def _check(cancel: threading.Event | None) -> None:
+    if cancel is not None and cancel.is_set():
+        raise MetaUpdateCancelled("Meta-update cancelled")
+
+
 def _safe_get_source(obj) -> str:
     try:
         return inspect.getsource(obj.__class__)
@@ -32,10 +48,29 @@ def meta_update(
     meta_params: Dict[str, Any],
     *,
     max_retries: int = 3,
+    max_repairs: int = META_MAX_REPAIRS,
+    n_candidates: int = RACE_CANDIDATES,
+    race_reports: List[Dict[str, Any]] | None = None,
+    cancel: threading.Event | None = None,
 ) -> Tuple[Any, Dict[str, Any]]:
     """
     Generate, filter, and instantiate a new base policy, feeding the full
     code of the last policy (and any error context) back into the Task Generator.
+
+    ``max_retries`` bounds the Task Generator rounds (re-plans).  Within a
+    round, a ϑ rejection is first answered by up to ``max_repairs`` fast
+    repairs that skip the Task Generator and send the rejected code plus
+    the exact filter error straight to the Code Generator; only then is
+    the task re-planned.  An API error on a repair call (connection
+    failure, timeout, 429/5xx) retries that call once; if it fails again
+    the round ends and the task is re-planned.
+
+    With ``n_candidates > 1`` the accepted task prompt is sampled several
+    more times and the accepted snippets are raced (successive halving);
+    the decision report is appended to ``race_reports`` when given.
+
+    ``cancel`` is checked before every LLM call; once set, the update
+    raises ``MetaUpdateCancelled`` (an in-flight request is not aborted).
     """
     error_msg: str | None = None
 
@@ -43,9 +78,10 @@ def meta_update(
     last_code_src = _safe_get_source(base_policy)
 
     for attempt in range(1, max_retries + 1):
+        _check(cancel)
         logger.info("Meta-update attempt %d/%d", attempt, max_retries)
 
-        # 1) Build task prompt, including the full text of the last policy
+        # 1) Re-plan via the Task Generator
         task_prompt = build_task_prompt(
             last_code_src,
             meta_history,
@@ -53,27 +89,104 @@ def meta_update(
             error_ctx=error_msg,
         )
 
-        # 2) Call Code Generator (generate_policy_code), fallback to last_code_src on API errors
+        # 2) Call Code Generator, fallback to last_code_src on API errors
+        _check(cancel)
         try:
-            code_snippet = generate_policy_code(task_prompt)
-        except RequestException as e:
+            code_snippet: str | None = generate_policy_code(task_prompt)
+        except (RequestException, CodeGenAPIError) as e:
             logger.warning(
                 "Code-generator API error (%s). Reusing last policy code.",
                 e
             )
             code_snippet = last_code_src
 
-        # Update last_code_src so the next prompt sees this snippet
-        last_code_src = code_snippet
+        repairs = 0
+        while code_snippet is not None:
+            # Update last_code_src so the next prompt sees this snippet
+            last_code_src = code_snippet
+
+            # 3) Filter & instantiate via ϑ
+            try:
+                new_policy, new_params = vartheta(code_snippet)
+            except ValueError as err:
+                error_msg = str(err)
+                logger.warning("ϑ rejected policy: %s", error_msg)
+            else:
+                logger.info("ϑ accepted generated policy")
+                if n_candidates <= 1:
+                    return new_policy, new_params
+                return _race_pool(
+                    task_prompt, code_snippet, new_policy, new_params,
+                    n_candidates, race_reports, cancel,
+                )
+
+            # 4) Fast repair with the same task prompt; after `max_repairs`
+            #    failures fall through to the next re-plan
+            if repairs >= max_repairs:
+                break
+            _check(cancel)
+            repairs += 1
+            logger.info("Fast repair %d/%d (Task Generator skipped)", repairs, max_repairs)
+            code_snippet = _repair(task_prompt, last_code_src, error_msg)
 
-        # 3) Filter & instantiate via ϑ
-        try:
-            new_policy, new_params = vartheta(code_snippet)
-            logger.info("ϑ accepted generated policy")
-            return new_policy, new_params
+    raise RuntimeError("Meta-controller failed after all retries.")
 
-        except ValueError as err:
-            error_msg = str(err)
-            logger.warning("ϑ rejected policy: %s", error_msg)
 
-    raise RuntimeError("Meta-controller failed after all retries.")
+def _repair(task_prompt: str, rejected_code: str, error_msg: str) -> str | None:
+    """
+    One fast-repair call, retried once on API errors (including HTTP
+    status errors such as 429).  Returns None when
+    the Code Generator stays unreachable so the caller re-plans instead
+    of re-filtering the rejected snippet.
+    """
+    for call in (1, 2):
+        try:
+            return repair_policy_code(task_prompt, rejected_code, error_msg)
+        except (RequestException, CodeGenAPIError) as e:
+            logger.warning("Repair API error (%s), call %d/2", e, call)
+    return None
+
+
+def _race_pool(
+    task_prompt: str,
+    first_code: str,
+    first_policy,
+    first_params: Dict[str, Any],
+    n_candidates: int,
+    race_reports: List[Dict[str, Any]] | None,
+    cancel: threading.Event | None = None,
+) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Sample ``n_candidates - 1`` further snippets for ``task_prompt``, keep
+    those ϑ accepts, and return the winner of a successive-halving race.
+    """
+    pool: List[Tuple[str, Any, Dict[str, Any]]] = [
+        (first_code, first_policy, first_params)
+    ]
+    for k in range(1, n_candidates):
+        _check(cancel)
+        try:
+            # fresh samples: a cached reply would just repeat the first candidate
+            code_snippet = generate_policy_code(task_prompt, use_cache=False)
+            policy, params = vartheta(code_snippet)
+        except (RequestException, RuntimeError, ValueError, SyntaxError) as e:
+            logger.warning("Candidate %d/%d discarded: %s", k + 1, n_candidates, e)
+            continue
+        pool.append((code_snippet, policy, params))
+
+    if len(pool) == 1:
+        return first_policy, first_params
+
+    _check(cancel)
+    # fresh instance per rung: policies keep internal state
+    factories = [lambda code=code: vartheta(code)[0] for code, _, _ in pool]
+    winner, report = race_candidates(factories)
+    logger.info(
+        "Race winner: candidate %d of %d (%d steps simulated)",
+        winner, len(pool), report["steps_simulated"],
+    )
+    if race_reports is not None:
+        race_reports.append(report)
+
+    _, policy, params = pool[winner]
+    return policy, params
@@ -2,12 +2,21 @@
 import numpy as np
 from collections import deque
 
+from config import FEATURE_WINDOWS
+from src.data.feature_store import feature_names
+
+
 class MovingAveragePolicy:
     """
     A simple baseline policy that charges when the current price
     is below the moving average over the last `window` steps,
     discharges when above, and holds otherwise.
     Unified take_action(state) API.
+
+    When `window` is one of FEATURE_WINDOWS the average is read from the
+    environment's ``price_mean_{window}`` feature column
+    (``uses_features``).  Otherwise, or when called with the plain
+    5-vector state, it keeps its own price history as before.
     """
 
     def __init__(self, window: int, max_rate: float = 1.0):
@@ -20,14 +29,20 @@ class MovingAveragePolicy:
         self.prices = deque(maxlen=window)
         self.max_rate = max_rate
 
+        names = feature_names(FEATURE_WINDOWS)
+        column = f"price_mean_{window}"
+        self.uses_features = column in names
+        self._avg_col = 5 + names.index(column) if self.uses_features else None
+
     def _take_action_scalar(
         self,
         state_of_charge: float,
         imported_energy: float,
         market_price: float,
-        cost: float
+        cost: float,
+        avg_price: float | None = None,
     ) -> float:
-        # Append to history
+        # Append to history (O(1); only summed when no feature is given)
         self.prices.append(market_price)
 
         # If not enough history yet, do nothing
@@ -35,7 +50,8 @@ class MovingAveragePolicy:
             return 0.0
 
         # Compute the moving average price
-        avg_price = sum(self.prices) / len(self.prices)
+        if avg_price is None:
+            avg_price = sum(self.prices) / len(self.prices)
 
         # Charge if current price below average
         if market_price < avg_price:
@@ -52,9 +68,13 @@ class MovingAveragePolicy:
         """
         Unified API:
           Args:
-            state: 5‐vector [soc, imported_energy, market_price, cost, demand]
+            state: 5‐vector [soc, imported_energy, market_price, cost, demand],
+                   optionally followed by the feature row
           Returns:
             Q_n: positive → charge, negative → discharge
         """
-        soc, imp_en, price, cost, demand = state
-        return self._take_action_scalar(soc, imp_en, price, cost)
+        soc, imp_en, price, cost, demand = state[:5]
+        avg = None
+        if self._avg_col is not None and len(state) > self._avg_col:
+            avg = float(state[self._avg_col])
+        return self._take_action_scalar(soc, imp_en, price, cost, avg)
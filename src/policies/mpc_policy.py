@@ -0,0 +1,216 @@
+# File: src/policies/mpc_policy.py
+import time
+
+import numpy as np
+
+from config import (
+    PRICE_SERIES,
+    DEMAND_SERIES,
+    BATTERY_CAPACITY_KWH,
+    MAX_RATE_KWH,
+    MPC_LOOKAHEAD,
+    MPC_SOC_STEP,
+    MPC_LATENCY_BUDGET_S,
+)
+
+
+class MPCPolicy:
+    """
+    Receding-horizon model-predictive control over a price forecast.
+    Unified take_action(state) API.
+
+    Uses the lossless dynamics of `transition`: after the action, demand
+    is served from SOC first, so the next SOC is
+
+        s' = max(clip(s + a, 0, C) - d, 0),   a ∈ [-R, R]
+
+    and the step cost is p' · (s' - s + d).  Cost is linear in the SOC
+    path, so each solve is an exact backward DP over a SOC grid whose
+    value functions stay convex; the best next SOC is the unconstrained
+    minimiser clipped to the reachable interval.
+
+    Warm start: moving the window one step only adds a new terminal.
+    The backward pass starts from the new terminal and stops as soon as
+    a value function matches the cached one up to a constant — from then
+    on every earlier value function (and so every decision) is
+    unchanged.  Per-step work is the coalescence depth, not the
+    lookahead.  If the per-step latency budget runs out first the pass
+    stops and the cached tail is reused (counted as ``truncated``).
+
+    The objective is the plain market-price cost.  A configured tariff
+    (TARIFF_*: import/export multipliers, ToU adders, demand charges,
+    export caps) is ignored when planning — the environment still bills
+    the realised actions with it.  Demand charges depend on the running
+    monthly peak and unequal import/export prices break the convexity
+    the clip-argmin step relies on, so neither fits this DP.
+    """
+
+    def __init__(
+        self,
+        lookahead: int = MPC_LOOKAHEAD,
+        soc_step: float = MPC_SOC_STEP,
+        latency_budget_s: float = MPC_LATENCY_BUDGET_S,
+        price_forecast=None,
+        demand_forecast=None,
+        capacity: float = BATTERY_CAPACITY_KWH,
+        max_rate: float = MAX_RATE_KWH,
+        tol: float = 1e-9,
+    ):
+        """
+        Args:
+            lookahead:        Steps in the planning window.
+            soc_step:         SOC grid resolution [kWh].
+            latency_budget_s: Per-step solve budget [s].
+            price_forecast:   Price per step index (default: PRICE_SERIES).
+            demand_forecast:  Demand per step index (default: DEMAND_SERIES).
+            capacity:         Battery capacity [kWh].
+            max_rate:         Charge/discharge limit per step [kWh].
+            tol:              Coalescence tolerance (relative).
+        """
+        self.lookahead = int(lookahead)
+        self.soc_step = float(soc_step)
+        self.latency_budget_s = float(latency_budget_s)
+        self.capacity = float(capacity)
+        self.max_rate = float(max_rate)
+        self.tol = tol
+
+        self.prices = np.asarray(
+            PRICE_SERIES if price_forecast is None else price_forecast, dtype=float
+        )
+        self.demand = np.asarray(
+            DEMAND_SERIES if demand_forecast is None else demand_forecast, dtype=float
+        )
+        self._last = min(self.prices.size, self.demand.size) - 1
+
+        n_grid = int(round(self.capacity / self.soc_step)) + 1
+        self.grid = np.arange(n_grid) * self.soc_step
+        self._bounds_cache = {}
+
+        # ring buffer of value functions V_k, row k % (lookahead + 1)
+        self._V = np.zeros((self.lookahead + 1, n_grid))
+        self._T = None          # terminal step of the current solution
+
+        self.t = 0
+        self.solve_times = []
+        self.depths = []
+        self.truncated = 0
+        self.cold_solve_s = 0.0
+        self._cold_solve()
+
+    # -----------------------------------------------------------------
+    # DP pieces
+    # -----------------------------------------------------------------
+    def _bounds(self, d: float):
+        """Grid-index interval of next SOCs reachable from every grid SOC."""
+        b = self._bounds_cache.get(d)
+        if b is None:
+            g, R, C = self.grid, self.max_rate, self.capacity
+            lo = np.maximum(g - R - d, 0.0)
+            hi = np.maximum(np.minimum(g + R, C) - d, 0.0)
+            lo_i = np.ceil(lo / self.soc_step - 1e-9).astype(int)
+            hi_i = np.floor(hi / self.soc_step + 1e-9).astype(int)
+            # off-grid rounding can leave an empty interval → nearest point
+            hi_i = np.maximum(hi_i, lo_i)
+            b = (lo_i, np.minimum(hi_i, self.grid.size - 1))
+            self._bounds_cache[d] = b
+        return b
+
+    def _backup(self, V_next: np.ndarray, k: int) -> np.ndarray:
+        """V_k from V_{k+1}: the transition k → k+1 priced at p[k+1]."""
+        p, d = self.prices[k + 1], self.demand[k + 1]
+        W = p * self.grid + V_next
+        lo, hi = self._bounds(d)
+        j = np.clip(np.argmin(W), lo, hi)
+        return W[j] - p * self.grid
+
+    def _row(self, k: int) -> int:
+        return k % (self.lookahead + 1)
+
+    def _cold_solve(self) -> None:
+        t0 = time.perf_counter()
+        T = min(self.t + self.lookahead, self._last)
+        self._V[self._row(T)] = 0.0      # leftover energy has no value
+        for k in range(T - 1, self.t, -1):
+            self._V[self._row(k)] = self._backup(self._V[self._row(k + 1)], k)
+        self._T = T
+        self.cold_solve_s = time.perf_counter() - t0
+
+    def _warm_solve(self) -> None:
+        """Extend the solution to the new terminal after t advanced."""
+        t0 = time.perf_counter()
+        T_new = min(self.t + self.lookahead, self._last)
+        depth = 0
+        if T_new > self._T:
+            T_old = self._T
+            self._V[self._row(T_new)] = 0.0
+            V = self._V[self._row(T_new)]
+            for k in range(T_new - 1, self.t, -1):
+                V = self._backup(V, k)
+                depth += 1
+                if k <= T_old:
+                    diff = V - self._V[self._row(k)]
+                    scale = 1.0 + np.abs(V).max()
+                    if np.ptp(diff) <= self.tol * scale:
+                        break                   # coalesced: rest unchanged
+                self._V[self._row(k)] = V
+                if time.perf_counter() - t0 > self.latency_budget_s:
+                    self.truncated += 1
+                    break
+            self._T = T_new
+        self.depths.append(depth)
+        self.solve_times.append(time.perf_counter() - t0)
+
+    # -----------------------------------------------------------------
+    # Unified API
+    # -----------------------------------------------------------------
+    def _take_action_scalar(self, state_of_charge: float) -> float:
+        t = self.t
+        if t >= self._last:
+            return 0.0
+        if t > 0:
+            self._warm_solve()
+
+        p, d = self.prices[t + 1], self.demand[t + 1]
+        W = p * self.grid + self._V[self._row(t + 1)]
+        target = self.grid[np.argmin(W)]
+
+        s, R, C = state_of_charge, self.max_rate, self.capacity
+        lo = max(s - R - d, 0.0)
+        hi = max(min(s + R, C) - d, 0.0)
+        target = min(max(target, lo), hi)
+        return float(np.clip(target - s + d, -R, R))
+
+    def take_action(self, state: np.ndarray) -> float:
+        """
+        Unified API:
+          Args:
+            state: 5‐vector [soc, imported_energy, market_price, cost, demand]
+          Returns:
+            Q_n: positive → charge, negative → discharge
+        """
+        soc, imp_en, price, cost, demand = state[:5]
+        try:
+            return self._take_action_scalar(float(soc))
+        finally:
+            self.t += 1
+
+    def solve_stats(self) -> dict:
+        """Per-step solve-time statistics (cold solve reported separately)."""
+        times = np.asarray(self.solve_times, dtype=float)
+        stats = dict(
+            lookahead=self.lookahead,
+            budget_s=self.latency_budget_s,
+            cold_solve_s=self.cold_solve_s,
+            steps=int(times.size),
+            truncated=self.truncated,
+        )
+        if times.size:
+            stats.update(
+                mean_s=float(times.mean()),
+                p50_s=float(np.percentile(times, 50)),
+                p99_s=float(np.percentile(times, 99)),
+                max_s=float(times.max()),
+                over_budget=int((times > self.latency_budget_s).sum()),
+                mean_depth=float(np.mean(self.depths)),
+            )
+        return stats
@@ -0,0 +1,40 @@
+# File: src/utils/atomic_write.py
+"""
+Atomic writes for the on-disk caches (features, series, LLM replies).
+
+Every writer gets its own temp file in the target directory, so threads
+and processes filling the same cache entry never share a temp name; the
+finished file is moved into place with ``os.replace``.  Readers see
+either no file or a complete one.
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+from pathlib import Path
+from typing import IO, Callable
+
+
+def atomic_write(path: str | os.PathLike, write: Callable[[IO[bytes]], None]) -> None:
+    """
+    Call ``write(f)`` on a fresh binary temp file next to ``path`` and
+    move it to ``path``.  A concurrent writer of the same entry that got
+    there first counts as success (cache entries are deterministic).
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp", delete=False
+    ) as f:
+        try:
+            write(f)
+        except BaseException:
+            f.close()
+            os.unlink(f.name)
+            raise
+    try:
+        os.replace(f.name, path)
+    except OSError:
+        os.unlink(f.name)
+        if not path.exists():
+            raise
@@ -3,18 +3,35 @@
 import ast
 import inspect
 import numpy as np
-from typing import Tuple, Dict, Any
+from typing import Tuple, Dict, Any, Sequence
 
+from config import FEATURE_WINDOWS
+from src.data.feature_store import feature_names
 
-def vartheta(wq_code: str) -> Tuple[Any, Dict[str, Any]]:
+# leading take_action arguments filled from the 5-vector state
+STATE_ARGS = ("state_of_charge", "imported_energy", "market_price", "cost")
+
+
+def vartheta(
+    wq_code: str,
+    features: Sequence[str] | None = None,
+) -> Tuple[Any, Dict[str, Any]]:
     """
     Filter and instantiate an LLM-generated policy, then ensure it
     conforms to take_action(state: np.ndarray) -> float.
 
+    A policy with ``uses_features = True`` receives the observation
+    (state followed by the feature row, columns ``features``; default:
+    the FEATURE_WINDOWS columns).  Extra ``take_action`` parameters after
+    (soc, imported, price, cost) are filled from the feature row by name.
+
     Raises ValueError on any safety, signature, or instantiation error.
     """
-    # 1) Parse & ban imports
-    tree = ast.parse(wq_code)
+    # 1) Parse & ban imports (truncated replies surface here as SyntaxError)
+    try:
+        tree = ast.parse(wq_code)
+    except SyntaxError as e:
+        raise ValueError(f"Syntax error in generated policy code: {e}")
     for node in ast.walk(tree):
         if isinstance(node, (ast.Import, ast.ImportFrom)):
             raise ValueError("Import statements not allowed in generated policy code.")
@@ -22,9 +39,12 @@ def vartheta(wq_code: str) -> Tuple[Any, Dict[str, Any]]:
     # 2) Exec in a namespace where np is available
     safe_globals: Dict[str, Any] = {"np": np}
     local_ns: Dict[str, Any] = {}
-    exec(compile(tree, filename="<generated_policy>", mode="exec"),
-         safe_globals,
-         local_ns)
+    try:
+        exec(compile(tree, filename="<generated_policy>", mode="exec"),
+             safe_globals,
+             local_ns)
+    except Exception as e:
+        raise ValueError(f"Error executing policy code: {type(e).__name__}: {e}")
 
     # 3) Find exactly one policy class
     policy_classes = [
@@ -58,10 +78,25 @@ def vartheta(wq_code: str) -> Tuple[Any, Dict[str, Any]]:
     orig = policy_inst.take_action
     bound_sig = inspect.signature(orig)
     if len(bound_sig.parameters) != 1:
-        # e.g. orig takes (soc, imp, price, cost)
+        # e.g. orig takes (soc, imp, price, cost[, price_mean_24, ...])
+        extra = list(bound_sig.parameters)[len(STATE_ARGS):]
+        if extra and not getattr(policy_inst, "uses_features", False):
+            raise ValueError(
+                f"take_action requests features {extra} but the class does not "
+                "set `uses_features = True`."
+            )
+        names = list(feature_names(FEATURE_WINDOWS) if features is None else features)
+        unknown = [n for n in extra if n not in names]
+        if unknown:
+            raise ValueError(
+                f"Unknown feature parameter(s) {unknown} in take_action; "
+                f"available features: {', '.join(names)}"
+            )
+        cols = [len(STATE_ARGS) + 1 + names.index(n) for n in extra]
+
         def unified_take_action(state: np.ndarray) -> float:
             soc, imp, price, cost, *_ = state
-            return orig(soc, imp, price, cost)
+            return orig(soc, imp, price, cost, *(state[j] for j in cols))
         policy_inst.take_action = unified_take_action  # override instance method
 
     return policy_inst, init_params
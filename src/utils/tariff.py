@@ -0,0 +1,253 @@
+# File: src/utils/tariff.py
+"""
+Tariff engine: time-of-use import prices, separate import/export rates,
+monthly peak-demand charges and monthly export caps.
+
+Two modes share one ``Tariff`` definition:
+
+• incremental – ``Tariff.new_state()`` returns a ``TariffState`` whose
+  ``step()`` bills one transition in O(1) (running monthly peak, per-block
+  energy, export credited so far).  ``transition`` and
+  ``BatteryEnvironment`` take it as an optional argument.
+• bulk        – ``Tariff.bill_bulk()`` bills whole (..., n) arrays of
+  imports/exports at once for batch backtests.
+
+The demand charge is accrued as the monthly peak rises, so the summed
+per-step cost always equals energy cost + demand_charge × Σ monthly peaks.
+
+A step is billed at the index of the price it is settled at, i.e. the
+transition from index k to k+1 is billed at index k+1.
+"""
+from __future__ import annotations
+
+import enum
+from typing import Any, Dict, Sequence, Tuple
+
+import numpy as np
+
+from config import (
+    STEPS_PER_DAY,
+    TARIFF_IMPORT_MULT,
+    TARIFF_EXPORT_MULT,
+    TARIFF_TOU,
+    TARIFF_DEMAND_CHARGE,
+    TARIFF_EXPORT_CAP_KWH,
+    TARIFF_DAYS_PER_MONTH,
+)
+
+
+def parse_tou(spec: str) -> list[Tuple[int, int, float]]:
+    """
+    ``"17-21:0.10,22-6:-0.05"`` → [(17, 21, 0.10), (22, 6, -0.05)]
+    Ranges are half-open in step-of-day units and may wrap midnight.
+    """
+    blocks = []
+    for item in filter(None, (x.strip() for x in spec.split(","))):
+        rng, _, adder = item.partition(":")
+        start, _, end = rng.partition("-")
+        blocks.append((int(start), int(end), float(adder)))
+    return blocks
+
+
+class Tariff:
+    """
+    Import price = market price × import_multiplier + ToU block adder
+    Export price = market price × export_multiplier
+    Demand charge: ``demand_charge`` per unit of the month's peak per-step
+    grid import.  Export beyond ``export_cap_kwh`` in a month earns nothing.
+    """
+
+    def __init__(
+        self,
+        *,
+        import_multiplier: float = 1.0,
+        export_multiplier: float = 1.0,
+        tou_blocks: Sequence[Tuple[int, int, float]] = (),
+        demand_charge: float = 0.0,
+        export_cap_kwh: float | None = None,
+        steps_per_day: int = STEPS_PER_DAY,
+        days_per_month: int = 30,
+    ):
+        self.import_multiplier = float(import_multiplier)
+        self.export_multiplier = float(export_multiplier)
+        self.demand_charge = float(demand_charge)
+        self.export_cap_kwh = None if export_cap_kwh is None else float(export_cap_kwh)
+        self.steps_per_day = int(steps_per_day)
+        self.steps_per_month = self.steps_per_day * int(days_per_month)
+
+        # block id per step-of-day (0 = no block) and adder per block id
+        self.block_of_tod = np.zeros(self.steps_per_day, dtype=int)
+        self.block_adder = np.zeros(len(tou_blocks) + 1)
+        for b, (start, end, adder) in enumerate(tou_blocks, start=1):
+            tod = np.arange(self.steps_per_day)
+            if start <= end:
+                mask = (tod >= start) & (tod < end)
+            else:                                   # wraps midnight
+                mask = (tod >= start) | (tod < end)
+            self.block_of_tod[mask] = b
+            self.block_adder[b] = adder
+        self.tou_adder_of_tod = self.block_adder[self.block_of_tod]
+
+    @property
+    def n_blocks(self) -> int:
+        return self.block_adder.size
+
+    def new_state(self, start_index: int = 1) -> "TariffState":
+        return TariffState(self, start_index)
+
+    # -----------------------------------------------------------------
+    # Bulk mode
+    # -----------------------------------------------------------------
+    def bill_bulk(
+        self,
+        import_kwh,
+        export_kwh,
+        prices,
+        *,
+        start_index: int = 1,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Bill (..., n) arrays of per-step import/export at ``prices``
+        (broadcastable, already aligned with the billed steps).
+
+        Returns per-step ``step_cost`` (..., n) — identical to summing
+        ``TariffState.step`` — plus ``energy_cost``, ``demand_cost``,
+        ``export_credited`` (..., n), ``monthly_peak`` (..., months) and
+        ``block_energy`` (..., n_blocks).
+        """
+        imp = np.asarray(import_kwh, dtype=float)
+        exp = np.asarray(export_kwh, dtype=float)
+        imp, exp = np.broadcast_arrays(imp, exp)
+        p = np.broadcast_to(np.asarray(prices, dtype=float), imp.shape)
+        n = imp.shape[-1]
+
+        idx   = start_index + np.arange(n)
+        tod   = idx % self.steps_per_day
+        month = idx // self.steps_per_month
+        month_ids, starts = np.unique(month, return_index=True)
+        bounds = list(starts) + [n]
+
+        imp_price = p * self.import_multiplier + self.tou_adder_of_tod[tod]
+        exp_price = p * self.export_multiplier
+
+        credited = exp
+        demand = np.zeros_like(imp)
+        peaks = np.zeros(imp.shape[:-1] + (month_ids.size,))
+        if self.export_cap_kwh is not None:
+            credited = np.empty_like(exp)
+        for j, (a, b) in enumerate(zip(bounds[:-1], bounds[1:])):
+            run_peak = np.maximum.accumulate(imp[..., a:b], axis=-1)
+            prev = np.concatenate([np.zeros(run_peak.shape[:-1] + (1,)), run_peak[..., :-1]], axis=-1)
+            demand[..., a:b] = self.demand_charge * (run_peak - prev)
+            peaks[..., j] = run_peak[..., -1]
+            if self.export_cap_kwh is not None:
+                cum = np.cumsum(exp[..., a:b], axis=-1)
+                capped = np.minimum(cum, self.export_cap_kwh)
+                credited[..., a:b] = np.diff(capped, axis=-1, prepend=0.0)
+
+        energy = imp * imp_price - credited * exp_price
+        block_energy = np.stack(
+            [(imp * (self.block_of_tod[tod] == k)).sum(axis=-1) for k in range(self.n_blocks)],
+            axis=-1,
+        )
+        return dict(
+            step_cost=energy + demand,
+            energy_cost=energy,
+            demand_cost=demand,
+            export_credited=credited,
+            monthly_peak=peaks,
+            block_energy=block_energy,
+        )
+
+
+class TariffState:
+    """
+    Incremental billing state; ``step()`` is O(1) per call.
+    """
+
+    def __init__(self, tariff: Tariff, start_index: int = 1):
+        self.tariff = tariff
+        self.index = start_index
+        self.month = start_index // tariff.steps_per_month
+        self.month_peak = 0.0
+        self.month_export = 0.0
+        self.block_energy = np.zeros(tariff.n_blocks)
+        self.monthly_peaks: list[float] = []
+        self.energy_cost = 0.0
+        self.demand_cost = 0.0
+
+    def step(self, import_kwh: float, export_kwh: float, price: float) -> float:
+        """Bill one step; return its cost (imports positive, exports negative)."""
+        t = self.tariff
+        month = self.index // t.steps_per_month
+        if month != self.month:                 # new billing month
+            self.monthly_peaks.append(self.month_peak)
+            self.month, self.month_peak, self.month_export = month, 0.0, 0.0
+
+        tod = self.index % t.steps_per_day
+        imp_price = price * t.import_multiplier + t.tou_adder_of_tod[tod]
+        exp_price = price * t.export_multiplier
+
+        credited = export_kwh
+        if t.export_cap_kwh is not None:
+            room = max(t.export_cap_kwh - self.month_export, 0.0)
+            credited = min(export_kwh, room)
+            self.month_export += export_kwh
+
+        demand = 0.0
+        if import_kwh > self.month_peak:
+            demand = t.demand_charge * (import_kwh - self.month_peak)
+            self.month_peak = import_kwh
+
+        energy = import_kwh * imp_price - credited * exp_price
+        self.block_energy[t.block_of_tod[tod]] += import_kwh
+        self.energy_cost += energy
+        self.demand_cost += demand
+        self.index += 1
+        return energy + demand
+
+    def summary(self) -> Dict[str, Any]:
+        return dict(
+            energy_cost=self.energy_cost,
+            demand_cost=self.demand_cost,
+            monthly_peaks=self.monthly_peaks + [self.month_peak],
+            block_energy=self.block_energy.tolist(),
+        )
+
+
+class TariffDefault(enum.Enum):
+    """Type of ``DEFAULT_TARIFF``; ``None`` already means market-price billing."""
+    DEFAULT = "default"
+
+
+# "use default_tariff()" – the default of every ``tariff=`` argument
+DEFAULT_TARIFF = TariffDefault.DEFAULT
+
+
+def default_tariff() -> Tariff | None:
+    """
+    Tariff from the TARIFF_* settings, or None when they describe plain
+    market-price billing (keeps the original ``transition`` arithmetic).
+    """
+    blocks = parse_tou(TARIFF_TOU)
+    if (
+        TARIFF_IMPORT_MULT == 1.0
+        and TARIFF_EXPORT_MULT == 1.0
+        and not blocks
+        and TARIFF_DEMAND_CHARGE == 0.0
+        and TARIFF_EXPORT_CAP_KWH is None
+    ):
+        return None
+    return Tariff(
+        import_multiplier=TARIFF_IMPORT_MULT,
+        export_multiplier=TARIFF_EXPORT_MULT,
+        tou_blocks=blocks,
+        demand_charge=TARIFF_DEMAND_CHARGE,
+        export_cap_kwh=TARIFF_EXPORT_CAP_KWH,
+        days_per_month=TARIFF_DAYS_PER_MONTH,
+    )
+
+
+def resolve_tariff(tariff: Tariff | TariffDefault | None) -> Tariff | None:
+    """``default_tariff()`` for ``DEFAULT_TARIFF``, else ``tariff`` itself."""
+    return default_tariff() if tariff is DEFAULT_TARIFF else tariff
@@ -7,6 +7,7 @@ def transition(
     action: float,
     next_price: float,
     next_demand: float,
+    tariff_state=None,
 ) -> np.ndarray:
     """
     Lossless battery dynamics with:
@@ -14,6 +15,9 @@ def transition(
       • grid import cost & export revenue
       • rate limits ±MAX_RATE_KWH
     This drops any charge/discharge inefficiencies (EFF_*).
+
+    With a ``TariffState`` (src.utils.tariff) the step is billed by the
+    tariff engine instead of at the plain market price.
     """
     soc, imported, _, cost, _ = state
 
@@ -24,6 +28,7 @@ def transition(
         charge_storable = min(action, BATTERY_CAPACITY_KWH - soc)
         new_soc = soc + charge_storable
         import_chg = charge_storable
+        energy_to_grid = 0.0
         export_rev = 0.0
     else:  # discharging / export
         discharge_req_bat = min(-action, soc)
@@ -42,7 +47,10 @@ def transition(
     import_total = import_chg + import_dmd
 
     # 3. cost update (imports positive, exports negative)
-    new_cost = cost + import_total * next_price - export_rev
+    if tariff_state is None:
+        new_cost = cost + import_total * next_price - export_rev
+    else:
+        new_cost = cost + tariff_state.step(import_total, energy_to_grid, next_price)
 
     return np.array(
         [
@@ -54,3 +62,31 @@ def transition(
         ],
         dtype=float,
     )
+
+
+def transition_batch(
+    soc: np.ndarray,
+    action: np.ndarray,
+    next_price: np.ndarray,
+    next_demand: np.ndarray,
+):
+    """
+    Array version of `transition` for many scenarios at once (same
+    lossless dynamics, market-price billing).
+
+    Returns (new_soc, import_total, energy_to_grid, step_cost).  With a
+    ``Tariff`` (src.utils.tariff), bill the collected import_total /
+    energy_to_grid arrays with ``Tariff.bill_bulk`` instead of using
+    step_cost; monthly peaks and export caps need the whole path.
+    """
+    action = np.clip(action, -MAX_RATE_KWH, MAX_RATE_KWH)
+    after_action = np.clip(soc + action, 0.0, BATTERY_CAPACITY_KWH)
+    import_chg = np.maximum(after_action - soc, 0.0)
+    energy_to_grid = np.maximum(soc - after_action, 0.0)
+
+    discharge_for_demand = np.minimum(after_action, next_demand)
+    new_soc = after_action - discharge_for_demand
+    import_total = import_chg + (next_demand - discharge_for_demand)
+
+    step_cost = import_total * next_price - energy_to_grid * next_price
+    return new_soc, import_total, energy_to_grid, step_cost
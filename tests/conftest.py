@@ -0,0 +1,58 @@
+import os
+import sys
+
+import pytest
+
+from config import MODEL_QWEN
+from src.bench.fake_openrouter import FakeOpenRouter
+from src.codegen import code_generator_qwen, task_generator
+
+
+@pytest.fixture
+def fake_router(monkeypatch):
+    """Start FakeOpenRouter(**kwargs) and point both LLM clients at it."""
+    def start(**kwargs):
+        srv = FakeOpenRouter(code_model=MODEL_QWEN, seed=0, **kwargs).start()
+        monkeypatch.setattr(task_generator, "OPENROUTER_BASE_URL", srv.base_url)
+        monkeypatch.setattr(code_generator_qwen, "OPENROUTER_BASE_URL", srv.base_url)
+        servers.append(srv)
+        return srv
+
+    servers = []
+    yield start
+    for srv in servers:
+        srv.stop()
+
+
+@pytest.fixture
+def llm_calls():
+    """(task-generator calls, code-generator calls) served by a fake router."""
+    def count(srv):
+        code = sum(e["model"] == MODEL_QWEN for e in srv.log)
+        return len(srv.log) - code, code
+    return count
+
+
+def _project_modules():
+    return {n: m for n, m in sys.modules.items() if n == "config" or n.startswith("src.")}
+
+
+@pytest.fixture
+def restore_project_modules():
+    """
+    Code that re-imports config and src (load harness, batch workers)
+    gets the original modules and environment put back afterwards, so
+    later tests keep patching the modules they imported.
+    """
+    saved_env = dict(os.environ)
+    saved = _project_modules()
+    yield
+    os.environ.clear()
+    os.environ.update(saved_env)
+    for name in _project_modules():
+        del sys.modules[name]
+    sys.modules.update(saved)
+    for name, module in saved.items():
+        parent, _, child = name.rpartition(".")
+        if parent in sys.modules:
+            setattr(sys.modules[parent], child, module)
@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+
+from config import INITIAL_SOC, MAX_RATE_KWH, BATTERY_CAPACITY_KWH
+from src.algorithm.racing import budget_schedule, race_candidates, simulate_policy
+from tests.test_filter import FEATURE_POLICY
+from tests.test_utils import _step_loop, _tariff
+
+
+# ------------------------------------------------------------------
+# Successive-halving race
+# ------------------------------------------------------------------
+class _Threshold:
+    """Charge below ``threshold``, discharge above, after ``warmup`` idle steps."""
+
+    def __init__(self, threshold, warmup=0):
+        self.threshold, self.warmup, self.n = threshold, warmup, 0
+
+    def take_action(self, state):
+        self.n += 1
+        if self.n <= self.warmup:
+            return 0.0
+        return 5.0 if state[2] < self.threshold else -5.0
+
+
+PRICES = 0.5 + 0.4 * np.sin(np.arange(101) * 2 * np.pi / 24)
+DEMAND = np.full(101, 1.0)
+
+
+def test_budget_schedule():
+    assert budget_schedule(100, min_budget=4, growth=2) == [4, 8, 16, 32, 64, 100]
+    assert budget_schedule(64, min_budget=4, growth=4) == [4, 16, 64]
+    assert budget_schedule(3, min_budget=4, growth=2) == [3]
+    with pytest.raises(ValueError):
+        budget_schedule(0)
+    with pytest.raises(ValueError):
+        budget_schedule(10, growth=1)
+
+
+def test_race_picks_best_and_halves_field():
+    thresholds = [0.1, 0.5, 0.9, 0.3]
+    factories = [lambda t=t: _Threshold(t) for t in thresholds]
+    winner, report = race_candidates(
+        factories, price_series=PRICES, demand_series=DEMAND,
+        max_budget=100, min_budget=25, drop_fraction=0.5,
+    )
+
+    final = report["rungs"][-1]
+    assert final["survivors"] == [winner]
+    assert final["scores"][winner] == min(final["scores"].values())
+    assert final["scores"][winner] == simulate_policy(
+        factories[winner](), PRICES, DEMAND, final["budget"]
+    )
+    assert report["winner"] == winner
+    assert report["schedule"] == [25, 50, 100]
+    assert [len(r["scores"]) for r in report["rungs"]] == [4, 2]
+    # each rung drops the worst half of the field
+    first = report["rungs"][0]
+    assert all(first["scores"][i] <= first["scores"][j]
+               for i in first["survivors"] for j in first["eliminated"])
+
+
+def test_race_carries_ties_to_next_rung():
+    # the better policy idles through rung 0 and ties with a worse one
+    factories = [
+        lambda: _Threshold(0.9, warmup=8),
+        lambda: _Threshold(0.9, warmup=8),
+        lambda: _Threshold(0.5, warmup=8),
+    ]
+    winner, report = race_candidates(
+        factories, price_series=PRICES, demand_series=DEMAND,
+        max_budget=100, min_budget=4, drop_fraction=0.5,
+    )
+
+    assert report["rungs"][0]["eliminated"] == []
+    assert winner == 2
+
+
+def test_simulate_policy_bills_with_tariff():
+    tariff = _tariff()
+    n = 48
+    prices, demand = PRICES[: n + 1], DEMAND[: n + 1]
+    actions = [_Threshold(0.5).take_action((0, 0, p, 0, 0)) for p in prices[:n]]
+
+    _, cost = _step_loop(actions, prices, demand, tariff)
+    billed = simulate_policy(_Threshold(0.5), prices, demand, n, tariff=tariff)
+    market = simulate_policy(_Threshold(0.5), prices, demand, n, tariff=None)
+    assert np.isclose(billed, cost[-1]) and not np.isclose(billed, market)
+
+
+def test_race_scores_feature_policies():
+    from src.utils.filter import vartheta
+
+    factories = [lambda: vartheta(FEATURE_POLICY)[0], lambda: _Threshold(0.1)]
+    _, report = race_candidates(
+        factories, price_series=PRICES, demand_series=DEMAND, max_budget=48,
+    )
+    assert all(np.isfinite(s) for r in report["rungs"] for s in r["scores"].values())
+
+
+# ------------------------------------------------------------------
+# Background meta-updates
+# ------------------------------------------------------------------
+def test_async_updates_land_at_segment_boundaries(fake_router, monkeypatch):
+    from src.algorithm import nested_algorithm
+
+    fake_router()
+    monkeypatch.setattr(nested_algorithm, "HORIZON", 40)
+    monkeypatch.setattr(nested_algorithm, "META_STEPS", 4)
+    out = nested_algorithm.run_nested_algorithm(asynchronous=True, await_s=-1)
+
+    # updates start at V=1 and V=2 and land one segment later; none at V=3
+    assert [p["active_from_step"] for p in out["policy_log"]] == [0, 20, 30]
+    assert out["policy_trace"] == [0] * 20 + [1] * 10 + [2] * 10
+    assert [s["policy_generations"] for s in out["per_segment"]] == [[0], [0], [1], [2]]
@@ -0,0 +1,87 @@
+import csv
+import json
+import logging
+import os
+import sys
+import types
+
+import numpy as np
+import pytest
+
+from src import batch
+
+
+def test_load_manifest_merges_defaults(tmp_path):
+    path = tmp_path / "manifest.json"
+    path.write_text(json.dumps({
+        "defaults": {"HORIZON": 48, "META_STEPS": 2},
+        "jobs": [{"name": "small", "BATTERY_CAPACITY_KWH": 50}, {"META_STEPS": 4}],
+    }))
+    assert batch.load_manifest(path) == [
+        {"name": "small", "HORIZON": 48, "META_STEPS": 2, "BATTERY_CAPACITY_KWH": 50},
+        {"name": "job_001", "HORIZON": 48, "META_STEPS": 4},
+    ]
+
+    path.write_text(json.dumps([{"name": "a"}, {"name": "a", "HORIZON": 24}]))
+    with pytest.raises(ValueError, match="unique"):
+        batch.load_manifest(path)
+
+
+def test_jobs_do_not_leak_settings(tmp_path, monkeypatch, restore_project_modules):
+    purge = batch._purge_project_modules
+
+    def purge_and_stub_main():
+        # run_experiment reports what a fresh config import sees
+        purge()
+        main = types.ModuleType("src.main")
+
+        def run_experiment():
+            import config
+            return dict(capacity=config.BATTERY_CAPACITY_KWH, seed=config.PRICE_SEED)
+
+        main.run_experiment = run_experiment
+        sys.modules["src.main"] = main
+
+    monkeypatch.setattr(batch, "_purge_project_modules", purge_and_stub_main)
+    monkeypatch.setattr(batch, "_BASE_ENV", {})
+    monkeypatch.delenv("PRICE_SEED", raising=False)
+    handlers = logging.getLogger().handlers[:]
+    try:
+        batch._init_worker({"SERIES_CACHE_DIR": str(tmp_path)})
+        first = batch._run_job(
+            {"name": "a", "BATTERY_CAPACITY_KWH": 50, "PRICE_SEED": 7}, str(tmp_path)
+        )
+        second = batch._run_job({"name": "b", "HORIZON": 48}, str(tmp_path))
+    finally:
+        logging.getLogger().handlers[:] = handlers
+
+    assert (first["status"], first["capacity"], first["seed"]) == ("ok", 50.0, 7)
+    assert (second["status"], second["capacity"], second["seed"]) == ("ok", 100.0, 42)
+    assert "PRICE_SEED" not in os.environ
+    assert sorted(p.name for p in tmp_path.glob("*.log")) == ["a.log", "b.log"]
+
+
+def test_write_results_includes_failed_jobs(tmp_path):
+    results = [
+        dict(name="a", params={"HORIZON": 48}, status="ok", error="", wall_s=1.23456,
+             baseline_cost=10.0, final_cost=8.0, savings_pct=[10.0, 30.0],
+             segment_costs=[5.0, 3.0]),
+        dict(name="b", params={"PRICE_SEED": 7}, status="failed",
+             error="RuntimeError: boom", wall_s=0.5),
+    ]
+    batch._write_results(results, tmp_path)
+
+    with open(tmp_path / "results.csv", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [r["name"] for r in rows] == ["a", "b"]
+    assert rows[0]["HORIZON"] == "48" and rows[0]["PRICE_SEED"] == ""
+    assert rows[0]["mean_savings_pct"] == "20.0" and rows[0]["last_savings_pct"] == "30.0"
+    assert rows[0]["n_segments"] == "2" and rows[0]["wall_s"] == "1.235"
+    assert rows[1]["status"] == "failed" and rows[1]["error"] == "RuntimeError: boom"
+    assert rows[1]["final_cost"] == "" and rows[1]["n_segments"] == "0"
+
+    npz = np.load(tmp_path / "results.npz")
+    assert list(npz["names"]) == ["a", "b"] and list(npz["status"]) == ["ok", "failed"]
+    assert npz["baseline_cost"][0] == 10.0 and np.isnan(npz["baseline_cost"][1])
+    assert list(npz["savings_pct_0"]) == [10.0, 30.0] and npz["savings_pct_1"].size == 0
+    assert list(npz["segment_costs_0"]) == [5.0, 3.0] and npz["segment_costs_1"].size == 0
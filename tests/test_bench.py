@@ -0,0 +1,34 @@
+import os
+
+import pytest
+
+from src.bench.load_harness import run_harness
+
+
+@pytest.fixture
+def harness_env(monkeypatch, tmp_path, restore_project_modules):
+    monkeypatch.setenv("FEATURE_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("META_STEPS", "3")
+
+
+def test_run_harness_report(harness_env):
+    env = dict(os.environ)
+    report = run_harness(runs=2, concurrency=2, seed=0)
+
+    assert dict(os.environ) == env
+    assert report["failed_runs"] == 0 and report["meta_steps"] == 4
+    assert report["meta_update_latency"]["n"] == 4
+    assert report["meta_update_failed"] == 0 and report["meta_update_failed_latency"] == {}
+    assert report["outcomes"] == {"ok": report["requests"]}
+
+    report = run_harness(runs=1, invalid_rate=1.0, seed=0)
+    assert report["failed_runs"] == 1 and report["meta_steps"] == 0
+    assert report["meta_update_failed"] == 1
+    assert report["meta_update_failed_latency"]["n"] == 1
+
+
+def test_run_harness_rejects_short_hang(harness_env):
+    env = dict(os.environ)
+    with pytest.raises(ValueError, match="client timeout"):
+        run_harness(task_timeout=2, code_timeout=1, hang_s=2)
+    assert dict(os.environ) == env
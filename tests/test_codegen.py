@@ -0,0 +1,32 @@
+from src.codegen import llm_cache
+from src.codegen.code_generator_qwen import generate_policy_code
+from src.codegen.task_generator import build_task_prompt
+
+
+def test_llm_cache_only_replays_deterministic_code_calls(
+    fake_router, llm_calls, monkeypatch, tmp_path
+):
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_DIR", str(tmp_path))
+    srv = fake_router()
+
+    sampled = {generate_policy_code("task", temperature=0.7) for _ in range(3)}
+    assert llm_calls(srv) == (0, 3) and len(sampled) > 1
+
+    greedy = {generate_policy_code("task", temperature=0.0) for _ in range(3)}
+    assert llm_calls(srv) == (0, 4) and len(greedy) == 1
+
+    generate_policy_code("task", temperature=0.0, use_cache=False)
+    assert llm_calls(srv) == (0, 5)
+
+
+def test_llm_cache_skips_sampled_task_prompts(fake_router, llm_calls, monkeypatch, tmp_path):
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_DIR", str(tmp_path))
+    srv = fake_router()
+
+    for _ in range(2):
+        build_task_prompt("", {}, {}, temperature=0.35)
+    assert llm_calls(srv) == (2, 0)
+
+    for _ in range(2):
+        build_task_prompt("", {}, {}, temperature=0.0)
+    assert llm_calls(srv) == (3, 0)
@@ -0,0 +1,44 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from src.data.feature_store import compute_features, load_features
+
+
+def test_load_features_concurrent_cold_cache(tmp_path):
+    prices = np.random.default_rng(0).uniform(0.0, 1.0, 500)
+    demand = np.ones(500)
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        stores = list(pool.map(
+            lambda _: load_features(prices, demand, cache_dir=tmp_path), range(64)
+        ))
+
+    expected = compute_features(prices, demand).matrix
+    assert all(np.array_equal(fs.matrix, expected) for fs in stores)
+    assert [p.suffix for p in tmp_path.iterdir()] == [".npz"]   # no temp files left
+
+
+def test_cached_price_series_concurrent_cold_cache(tmp_path):
+    from src.data.series_model import cached_price_series, generate_price_series
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        series = list(pool.map(
+            lambda _: cached_price_series(100, seed=3, cache_dir=tmp_path), range(64)
+        ))
+
+    assert all(s == generate_price_series(100, seed=3) for s in series)
+    assert [p.name for p in tmp_path.iterdir()] == ["price_h100_s3.npy"]
+
+
+def test_llm_cache_concurrent_puts(tmp_path, monkeypatch):
+    from src.codegen import llm_cache
+
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_DIR", str(tmp_path))
+    payload = {"model": "m", "messages": [], "temperature": 0}
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        list(pool.map(lambda i: llm_cache.cache_put(payload, {"content": "x"}), range(64)))
+
+    assert llm_cache.cache_get(payload) == {"content": "x"}
+    assert len(list(tmp_path.rglob("*"))) == 2          # shard dir + one entry
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from src.data.feature_store import compute_features
+from src.utils.filter import vartheta
+
+PRICES = 0.5 + 0.4 * np.sin(np.arange(101) * 2 * np.pi / 24)
+DEMAND = np.full(101, 1.0)
+
+FEATURE_POLICY = """
+class GeneratedPolicy:
+    uses_features = True
+
+    def __init__(self, margin: float = 0.0):
+        self.margin = margin
+
+    def take_action(self, state_of_charge, imported_energy, market_price, cost, price_mean_24):
+        if market_price < price_mean_24 - self.margin:
+            return 5.0
+        return -min(5.0, state_of_charge)
+"""
+
+
+def test_vartheta_passes_features_by_name():
+    fs = compute_features(PRICES, DEMAND, windows=(24,))
+    policy, params = vartheta(FEATURE_POLICY, fs.names)
+    assert params == {"margin": 0.0} and policy.uses_features
+
+    row = fs.row(30)
+    mean = row[fs.index("price_mean_24")]
+    assert policy.take_action((10.0, 0.0, mean - 0.01, 0.0, 1.0, *row)) == 5.0
+    assert policy.take_action((10.0, 0.0, mean + 0.01, 0.0, 1.0, *row)) == -5.0
+
+    with pytest.raises(ValueError, match="Unknown feature"):
+        vartheta(FEATURE_POLICY.replace("price_mean_24", "price_mean_7"), fs.names)
+    with pytest.raises(ValueError, match="uses_features"):
+        vartheta(FEATURE_POLICY.replace("uses_features = True", "pass"), fs.names)
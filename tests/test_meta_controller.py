@@ -0,0 +1,98 @@
+import threading
+
+import pytest
+
+from src.codegen import code_generator_qwen
+from src.meta import meta_controller
+from src.meta.meta_controller import meta_update
+from src.policies.moving_average_policy import MovingAveragePolicy
+
+
+def test_repairs_skip_task_generator(fake_router, llm_calls, monkeypatch):
+    srv = fake_router()
+    rejected = iter(["boom", "boom"])
+    real = meta_controller.vartheta
+
+    def flaky_vartheta(code):
+        if next(rejected, None):
+            raise ValueError("ϑ says no")
+        return real(code)
+
+    monkeypatch.setattr(meta_controller, "vartheta", flaky_vartheta)
+    policy, _ = meta_update(MovingAveragePolicy(24), {}, {}, max_retries=1, max_repairs=2)
+
+    assert policy.__class__.__name__ == "GeneratedPolicy"
+    assert llm_calls(srv) == (1, 3)          # one plan, one draft, two repairs
+
+
+def test_max_retries_counts_replans(fake_router, llm_calls):
+    srv = fake_router(invalid_rate=1.0)
+    with pytest.raises(RuntimeError):
+        meta_update(MovingAveragePolicy(24), {}, {}, max_retries=3, max_repairs=2)
+
+    assert llm_calls(srv) == (3, 9)          # 3 × (plan + draft + 2 repairs)
+
+
+def test_cancelled_update_stops_before_next_call(fake_router, llm_calls, monkeypatch):
+    srv = fake_router(invalid_rate=1.0)
+    cancel = threading.Event()
+    real = meta_controller.vartheta
+
+    def vartheta_then_cancel(code):
+        cancel.set()
+        return real(code)
+
+    monkeypatch.setattr(meta_controller, "vartheta", vartheta_then_cancel)
+    with pytest.raises(meta_controller.MetaUpdateCancelled):
+        meta_update(MovingAveragePolicy(24), {}, {}, max_retries=3, cancel=cancel)
+
+    assert llm_calls(srv) == (1, 1)          # no repair after the cancel
+
+
+def test_repair_api_error_is_retried(fake_router, monkeypatch):
+    fake_router(invalid_rate=1.0)
+    seen = []
+    real = code_generator_qwen.repair_policy_code
+
+    def flaky_repair(task_prompt, rejected_code, error):
+        seen.append(rejected_code)
+        if len(seen) == 1:
+            raise code_generator_qwen.RequestException("connection reset")
+        return real(task_prompt, rejected_code, error)
+
+    monkeypatch.setattr(meta_controller, "repair_policy_code", flaky_repair)
+    with pytest.raises(RuntimeError):
+        meta_update(MovingAveragePolicy(24), {}, {}, max_retries=1, max_repairs=1)
+
+    # the failed call is retried with the same rejected snippet
+    assert len(seen) == 2 and seen[0] == seen[1]
+
+
+def test_rate_limited_repair_falls_back_to_replanning(fake_router, llm_calls, monkeypatch):
+    srv = fake_router()
+    real_vartheta = meta_controller.vartheta
+    real_repair = meta_controller.repair_policy_code
+    rejected = iter([True])
+    repairs = []
+
+    def reject_first_draft(code):
+        if next(rejected, False):
+            srv.rate_limit_rate = 1.0               # every repair call gets a 429
+            raise ValueError("ϑ says no")
+        return real_vartheta(code)
+
+    def counted_repair(*args):
+        repairs.append(args)
+        try:
+            return real_repair(*args)
+        finally:
+            if len(repairs) == 2:
+                srv.rate_limit_rate = 0.0
+
+    monkeypatch.setattr(meta_controller, "vartheta", reject_first_draft)
+    monkeypatch.setattr(meta_controller, "repair_policy_code", counted_repair)
+    policy, _ = meta_update(MovingAveragePolicy(24), {}, {}, max_retries=2, max_repairs=2)
+
+    assert policy.__class__.__name__ == "GeneratedPolicy"
+    assert [e["outcome"] for e in srv.log].count("rate_limited") == 2
+    assert llm_calls(srv) == (2, 4)          # plan, draft, 2 × 429 repair, re-plan, draft
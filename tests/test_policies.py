@@ -0,0 +1,179 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from src.policies.mpc_policy import MPCPolicy
+from src.utils.scan_eval import evaluate_open_loop
+
+CAPACITY, RATE = 4.0, 2.0
+
+
+def _series(n, seed):
+    rng = np.random.default_rng(seed)
+    prices = np.round(rng.uniform(0.1, 1.0, n + 1), 3)
+    demand = rng.choice([0.0, 1.0, 2.0], n + 1)
+    return prices, demand
+
+
+def _run_mpc(mpc, prices, demand, initial_soc):
+    soc, actions = initial_soc, []
+    for n in range(len(prices) - 1):
+        a = mpc.take_action((soc, 0.0, prices[n], 0.0, demand[n]))
+        actions.append(a)
+        soc = evaluate_open_loop(
+            [a], prices[n:n + 2], demand[n:n + 2],
+            initial_soc=soc, capacity=CAPACITY, max_rate=RATE,
+        )["soc"][-1]
+    return np.array(actions)
+
+
+def _mpc(prices, demand, lookahead):
+    return MPCPolicy(
+        lookahead=lookahead, soc_step=1.0, latency_budget_s=10.0,
+        price_forecast=prices, demand_forecast=demand,
+        capacity=CAPACITY, max_rate=RATE,
+    )
+
+
+def test_mpc_matches_brute_force():
+    n = 6
+    for seed in range(5):
+        prices, demand = _series(n, seed)
+        kw = dict(initial_soc=2.0, capacity=CAPACITY, max_rate=RATE)
+
+        grid_actions = np.arange(-RATE, RATE + 1.0)
+        every = np.array(list(itertools.product(grid_actions, repeat=n)))
+        best = evaluate_open_loop(every, prices, demand, **kw)["cost"][:, -1].min()
+
+        actions = _run_mpc(_mpc(prices, demand, n), prices, demand, 2.0)
+        cost = evaluate_open_loop(actions, prices, demand, **kw)["cost"][-1]
+        assert np.isclose(cost, best, rtol=0, atol=1e-9)
+
+
+def test_mpc_warm_start_matches_cold_solves():
+    n, lookahead = 60, 12
+    prices, demand = _series(n, 7)
+    warm = _mpc(prices, demand, lookahead)
+    soc = 1.0
+    for t in range(n):
+        cold = _mpc(prices[t:], demand[t:], lookahead)
+        expected = cold.take_action((soc, 0.0, prices[t], 0.0, demand[t]))
+        assert np.isclose(warm.take_action((soc, 0.0, prices[t], 0.0, demand[t])), expected)
+        soc = evaluate_open_loop(
+            [expected], prices[t:t + 2], demand[t:t + 2],
+            initial_soc=soc, capacity=CAPACITY, max_rate=RATE,
+        )["soc"][-1]
+    assert warm.truncated == 0
+
+
+# ------------------------------------------------------------------
+# Policy tabulation
+# ------------------------------------------------------------------
+class _Threshold:
+    def __init__(self, threshold=0.5):
+        self.threshold = threshold
+        self.calls = 0
+
+    def take_action(self, state):
+        self.calls += 1
+        soc, _, price, _, demand = state
+        return 10.0 if price < self.threshold else -min(10.0, soc)
+
+
+def test_tabulate_policy_leaves_caller_instance_alone():
+    from src.policies.tabulated_policy import tabulate_policy
+
+    policy = _Threshold()
+    table, report = tabulate_policy(policy, n_check=50)
+    assert policy.calls == 0
+    assert report["policy_name"] == table.source_name == "_Threshold"
+
+
+def test_tabulate_policy_rejects_stateful_policy():
+    from src.policies.moving_average_policy import MovingAveragePolicy
+    from src.policies.tabulated_policy import tabulate_policy
+
+    with pytest.raises(ValueError, match="not stateless"):
+        tabulate_policy(MovingAveragePolicy(window=3), n_check=0)
+
+
+class _Smooth:
+    def take_action(self, state):
+        soc, _, price, _, demand = state
+        return 0.1 * soc - 3.0 * price + demand
+
+
+@pytest.mark.parametrize("mode", ["interp", "nearest"])
+def test_table_matches_probes_at_grid_nodes(mode):
+    from src.policies.tabulated_policy import tabulate_policy
+
+    grids = [np.linspace(0, 100, 5), np.array([0.1, 0.3, 0.8, 1.2]), np.array([0.0, 5.0])]
+    table, _ = tabulate_policy(_Smooth(), soc_grid=grids[0], price_grid=grids[1],
+                               demand_grid=grids[2], mode=mode, n_check=0)
+    S, P, D = np.meshgrid(*grids, indexing="ij")
+    probed = np.vectorize(lambda s, p, d: _Smooth().take_action((s, 0.0, p, 0.0, d)))(S, P, D)
+    assert np.allclose(table.table, probed, rtol=0, atol=1e-12)
+    assert np.allclose(table.lookup(S, P, D), probed, rtol=0, atol=1e-12)
+
+
+def test_tabulate_policy_maps_non_finite_actions_to_zero():
+    from src.policies.tabulated_policy import tabulate_policy
+
+    class _Overflowing:
+        def take_action(self, state):
+            if state[2] > 0.5:
+                return float("nan")
+            return float("inf") if state[0] > 50 else 1.0
+
+    table, _ = tabulate_policy(_Overflowing(), soc_grid=[0, 100], price_grid=[0.1, 1.0],
+                               demand_grid=[1.0], n_check=0)
+    assert table.table[:, :, 0].tolist() == [[1.0, 0.0], [0.0, 0.0]]
+
+
+def test_simulate_batch_bills_with_tariff():
+    from src.policies.tabulated_policy import tabulate_policy, simulate_batch
+    from src.utils.tariff import Tariff
+    from src.utils.transition import transition
+
+    tariff = Tariff(import_multiplier=1.1, export_multiplier=0.7,
+                    demand_charge=1.5, export_cap_kwh=30.0, days_per_month=1)
+    table, _ = tabulate_policy(_Threshold(), n_check=0)
+    rng = np.random.default_rng(3)
+    prices = rng.uniform(0.1, 1.0, (3, 49))
+    demand = rng.choice([0.0, 1.0, 5.0], (3, 49))
+
+    out = simulate_batch(table, prices, demand, tariff=tariff)
+    for row in range(3):
+        state = np.array([out["soc"][row, 0], 0.0, prices[row, 0], 0.0, demand[row, 0]])
+        billing = tariff.new_state()
+        for k, a in enumerate(out["actions"][row]):
+            state = transition(state, a, prices[row, k + 1], demand[row, k + 1], billing)
+        assert np.isclose(out["cost"][row, -1], state[3], rtol=0, atol=1e-9)
+        assert np.isclose(out["soc"][row, -1], state[0])
+
+
+# ------------------------------------------------------------------
+# Moving-average baseline on the feature store
+# ------------------------------------------------------------------
+def test_moving_average_feature_path_matches_deque():
+    from src.data.feature_store import compute_features
+    from src.policies.moving_average_policy import MovingAveragePolicy
+
+    for prices in (np.full(200, 0.1), np.random.default_rng(4).uniform(0.0, 1.0, 300)):
+        fs = compute_features(prices, np.ones(prices.size), windows=(24,))
+        with_features, plain = MovingAveragePolicy(24), MovingAveragePolicy(24)
+        assert with_features.uses_features
+        for i, p in enumerate(prices):
+            state = (5.0, 0.0, p, 0.0, 1.0)
+            assert with_features.take_action(state + tuple(fs.row(i))) == plain.take_action(state)
+
+
+def test_moving_average_without_feature_column(monkeypatch):
+    from src.policies import moving_average_policy
+
+    monkeypatch.setattr(moving_average_policy, "FEATURE_WINDOWS", [12])
+    policy = moving_average_policy.MovingAveragePolicy(24)
+    assert not policy.uses_features
+    actions = [policy.take_action((5.0, 0.0, p, 0.0, 1.0)) for p in np.linspace(1, 0, 30)]
+    assert actions[:23] == [0.0] * 23 and actions[-1] == 1.0
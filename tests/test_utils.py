@@ -0,0 +1,85 @@
+import numpy as np
+
+from config import INITIAL_SOC, MAX_RATE_KWH, BATTERY_CAPACITY_KWH
+from src.utils.transition import transition
+
+
+# ------------------------------------------------------------------
+# Prefix-scan evaluation of open-loop actions
+# ------------------------------------------------------------------
+def _step_loop(actions, prices, demand, tariff=None):
+    state = np.array([INITIAL_SOC, 0.0, prices[0], 0.0, demand[0]])
+    billing = tariff.new_state() if tariff is not None else None
+    soc, cost = [state[0]], [state[3]]
+    for n, a in enumerate(actions):
+        state = transition(state, a, prices[n + 1], demand[n + 1], billing)
+        soc.append(state[0])
+        cost.append(state[3])
+    return np.array(soc), np.array(cost)
+
+
+def test_open_loop_scan_matches_transition_loop():
+    from src.utils.scan_eval import evaluate_open_loop
+
+    rng = np.random.default_rng(0)
+    n = 500
+    prices = rng.uniform(0.1, 1.0, n + 1)
+    demand = rng.choice([0.0, 1.0, 5.0, 20.0], n + 1)
+    actions = rng.uniform(-2 * MAX_RATE_KWH, 2 * MAX_RATE_KWH, (4, n))
+
+    out = evaluate_open_loop(actions, prices, demand)
+    for row in range(actions.shape[0]):
+        soc, cost = _step_loop(actions[row], prices, demand)
+        np.testing.assert_allclose(out["soc"][row], soc, rtol=0, atol=2e-14 * BATTERY_CAPACITY_KWH)
+        np.testing.assert_allclose(out["cost"][row], cost, rtol=0, atol=1e-11)
+
+
+# ------------------------------------------------------------------
+# Tariff engine
+# ------------------------------------------------------------------
+def _tariff():
+    from src.utils.tariff import Tariff, parse_tou
+
+    return Tariff(
+        import_multiplier=1.2,
+        export_multiplier=0.8,
+        tou_blocks=parse_tou("17-21:0.10,22-6:-0.05"),
+        demand_charge=2.5,
+        export_cap_kwh=40.0,
+        steps_per_day=24,
+        days_per_month=3,
+    )
+
+
+def test_bill_bulk_matches_incremental_steps():
+    tariff = _tariff()
+    rng = np.random.default_rng(1)
+    n = 24 * 8                                   # spans several billing months
+    imp = rng.uniform(0.0, 10.0, n) * (rng.random(n) < 0.7)
+    exp = rng.uniform(0.0, 5.0, n) * (rng.random(n) < 0.4)
+    prices = rng.uniform(0.1, 1.0, n)
+
+    bulk = tariff.bill_bulk(imp, exp, prices)
+    state = tariff.new_state()
+    steps = np.array([state.step(i, e, p) for i, e, p in zip(imp, exp, prices)])
+    summary = state.summary()
+
+    np.testing.assert_allclose(bulk["step_cost"], steps, rtol=0, atol=1e-12)
+    np.testing.assert_allclose(bulk["monthly_peak"], summary["monthly_peaks"])
+    np.testing.assert_allclose(bulk["block_energy"], summary["block_energy"])
+    assert np.isclose(bulk["demand_cost"].sum(), 2.5 * sum(summary["monthly_peaks"]))
+
+
+def test_open_loop_scan_bills_with_tariff():
+    from src.utils.scan_eval import evaluate_open_loop
+
+    tariff = _tariff()
+    rng = np.random.default_rng(2)
+    n = 200
+    prices = rng.uniform(0.1, 1.0, n + 1)
+    demand = rng.choice([0.0, 1.0, 5.0], n + 1)
+    actions = rng.uniform(-MAX_RATE_KWH, MAX_RATE_KWH, n)
+
+    out = evaluate_open_loop(actions, prices, demand, tariff=tariff)
+    _, cost = _step_loop(actions, prices, demand, tariff)
+    np.testing.assert_allclose(out["cost"], cost, rtol=0, atol=1e-11)